@@ -8,98 +8,161 @@ from sklearn.metrics import confusion_matrix, accuracy_score
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Conv1D, MaxPooling1D, LSTM, Dense, Dropout
 import matplotlib.pyplot as plt
+import argparse
 import io
+import os
+import time
+import tempfile
 from PIL import Image
+from windowing import create_sequences, window_labels
+from batch_stream import write_csv_predictions
+from prediction_cache import load_or_build_predictions
+from artifact_store import artifact_key, load_artifacts, save_artifacts
+from dataset_cache import load_dataset, select_columns, fill_missing, as_frame
+from feature_reduction import REDUCTIONS, fit_reducer, Preprocessor
+
+# Parse our own flags only; anything else is left for Gradio / the notebook kernel
+parser = argparse.ArgumentParser(description="HAR Gradio app")
+parser.add_argument('--retrain', action='store_true', help="Ignore cached artifacts and train a new model")
+parser.add_argument('--reduction', choices=REDUCTIONS, default='none',
+                    help="PCA or ANOVA feature selection after scaling (see bench_reduction.py)")
+parser.add_argument('--components', type=int, default=64, help="Features kept by --reduction")
+args, _ = parser.parse_known_args()
+startup_start = time.perf_counter()
 
 # Load the train and test datasets
 TRAIN_CSV_PATH = "/content/sample_data/train_har.csv"
 TEST_CSV_PATH = "/content/sample_data/test.csv"
-train_df = pd.read_csv(TRAIN_CSV_PATH)
-test_df = pd.read_csv(TEST_CSV_PATH)
+ARTIFACT_DIR = "/content/har_artifacts"
+# float32 features (non-numeric values as NaN) and labels, converted from each CSV once and
+# memory-mapped afterwards; the cache is keyed by the CSV's content hash
+DATASET_CACHE_DIR = "/content/har_dataset_cache"
+train_data = load_dataset(TRAIN_CSV_PATH, DATASET_CACHE_DIR)
+test_data = load_dataset(TEST_CSV_PATH, DATASET_CACHE_DIR)
 
 # Prepare features and labels
-feature_columns = [col for col in train_df.columns if col not in ['Activity', 'subject']]
-X_train = train_df[feature_columns]
-y_train = train_df['Activity']
-X_test = test_df[feature_columns]
-y_test = test_df['Activity']
+feature_columns = train_data['feature_columns']
+X_train = train_data['X']
+y_train = train_data['y']
+# Test columns by name in the training order, as the scaler and model expect
+X_test = select_columns(test_data, feature_columns)
+y_test = test_data['y']
 
-# Encode labels
-le = LabelEncoder()
-y_train_enc = le.fit_transform(y_train)
-y_test_enc = le.transform(y_test)
+# Training hyperparameters; together with the CSV hashes they key the artifact store
+WINDOW_SIZE = 5
+HYPERPARAMS = {
+    'window_size': WINDOW_SIZE,
+    'epochs': 10,
+    'batch_size': 64,
+    'conv_filters': 64,
+    'lstm_units': 64,
+    'dense_units': 64,
+    'dropout': 0.4,
+    'reduction': args.reduction,
+    'n_components': args.components if args.reduction != 'none' else None,
+}
 
-X_train = X_train.apply(pd.to_numeric, errors='coerce')
-X_test = X_test.apply(pd.to_numeric, errors='coerce')
+def build_model(num_features, num_classes):
+    """CNN+LSTM over (WINDOW_SIZE, num_features) windows"""
+    model = Sequential([
+        Conv1D(filters=HYPERPARAMS['conv_filters'], kernel_size=3, activation='relu', input_shape=(WINDOW_SIZE, num_features)),
+        MaxPooling1D(pool_size=2),
+        Dropout(HYPERPARAMS['dropout']),
+        LSTM(HYPERPARAMS['lstm_units'], return_sequences=False),
+        Dense(HYPERPARAMS['dense_units'], activation='relu'),
+        Dropout(HYPERPARAMS['dropout']),
+        Dense(num_classes, activation='softmax')
+    ])
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    return model
 
-X_train = X_train.fillna(X_train.mean())
-X_test = X_test.fillna(X_train.mean())
+ARTIFACT_KEY = artifact_key([TRAIN_CSV_PATH, TEST_CSV_PATH], HYPERPARAMS)
+artifacts = None if args.retrain else load_artifacts(ARTIFACT_DIR, ARTIFACT_KEY)
 
-# Scale features
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
+if artifacts is not None:
+    # Cache hit: reuse the fitted encoder, scaler (+ reducer), fill-means and weights
+    print(f"Loaded artifacts {ARTIFACT_KEY} from {ARTIFACT_DIR}")
+    model = artifacts['model']
+    preprocessor = artifacts['scaler']
+    le = artifacts['label_encoder']
+    fill_means = pd.Series(artifacts['fill_means'])
+    y_test_enc = le.transform(y_test)
+    X_test = fill_missing(X_test, fill_means[feature_columns].to_numpy())
+    X_test_scaled = preprocessor.transform(as_frame(X_test, feature_columns))
+else:
+    print("Training new model..." if args.retrain else f"No artifacts for {ARTIFACT_KEY}, training...")
 
-# Create sequences for CNN+LSTM
-WINDOW_SIZE = 5
-NUM_FEATURES = X_train_scaled.shape[1]
-def create_sequences(X, y, window_size=5):
-    Xs, ys = [], []
-    for i in range(len(X) - window_size + 1):
-        Xs.append(X[i:(i + window_size)])
-        ys.append(y[i + window_size - 1])
-    return np.array(Xs), np.array(ys)
+    # Encode labels
+    le = LabelEncoder()
+    y_train_enc = le.fit_transform(y_train)
+    y_test_enc = le.transform(y_test)
 
-X_train_seq, y_train_seq = create_sequences(X_train_scaled, y_train_enc, WINDOW_SIZE)
-X_test_seq, y_test_seq = create_sequences(X_test_scaled, y_test_enc, WINDOW_SIZE)
+    # Missing values take the training-column means (computed when the cache was built)
+    fill_means = pd.Series(train_data['column_means'].astype(np.float64), index=feature_columns)
+    X_train = fill_missing(X_train, train_data['column_means'])
+    X_test = fill_missing(X_test, train_data['column_means'])
 
-NUM_CLASSES = len(le.classes_)
+    # Scale features
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(as_frame(X_train, feature_columns))
+
+    # Optional reduction to n_components model features, stored with the scaler
+    reducer = fit_reducer(X_train_scaled, y_train_enc, HYPERPARAMS['reduction'], HYPERPARAMS['n_components'])
+    if reducer is not None:
+        X_train_scaled = reducer.transform(X_train_scaled)
+    preprocessor = Preprocessor(scaler, reducer)
+    X_test_scaled = preprocessor.transform(as_frame(X_test, feature_columns))
 
-# Build CNN+LSTM model
-model = Sequential([
-    Conv1D(filters=64, kernel_size=3, activation='relu', input_shape=(WINDOW_SIZE, NUM_FEATURES)),
-    MaxPooling1D(pool_size=2),
-    Dropout(0.4),
-    LSTM(64, return_sequences=False),
-    Dense(64, activation='relu'),
-    Dropout(0.4),
-    Dense(NUM_CLASSES, activation='softmax')
-])
+    # Windows are read-only strided views over the scaled matrices (no per-row copies)
+    X_train_seq, y_train_seq = create_sequences(X_train_scaled, y_train_enc, WINDOW_SIZE)
+    X_test_seq, y_test_seq = create_sequences(X_test_scaled, y_test_enc, WINDOW_SIZE)
 
-model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
-model.fit(X_train_seq, y_train_seq, epochs=10, batch_size=64, validation_data=(X_test_seq, y_test_seq), verbose=2)
+    model = build_model(X_train_scaled.shape[1], len(le.classes_))
+    model.fit(X_train_seq, y_train_seq, epochs=HYPERPARAMS['epochs'], batch_size=HYPERPARAMS['batch_size'],
+              validation_data=(X_test_seq, y_test_seq), verbose=2)
+
+    save_artifacts(ARTIFACT_DIR, ARTIFACT_KEY, model, preprocessor, le, feature_columns, fill_means,
+                   hyperparams=HYPERPARAMS)
+
+NUM_FEATURES = preprocessor.n_features_out  # Model input width (n_components under --reduction)
+NUM_CLASSES = len(le.classes_)
+y_test_seq = window_labels(y_test_enc, WINDOW_SIZE)
 
 # Save label classes for mapping
 label_map = {i: label for i, label in enumerate(le.classes_)}
 
+# Batch uploads show at most this many result rows; the full results are downloadable
+BATCH_PREVIEW_ROWS = 1000
+
 # Gradio prediction history
 prediction_history = []
 
 # Use the test set for random predictions
-random_df = test_df.reset_index(drop=True)
-random_X_scaled = scaler.transform(random_df[feature_columns])
+NUM_TEST_ROWS = len(y_test)
+
+# Probabilities for every test window, computed once per model version and shared by
+# the prediction tab and the EDA plots (window i starts at test row i)
+CACHE_DIR = "/content/har_cache"
+test_probs = load_or_build_predictions(model, X_test_scaled, WINDOW_SIZE, CACHE_DIR)
+test_pred_labels = np.argmax(test_probs, axis=1)
+print(f"Startup took {time.perf_counter() - startup_start:.1f}s "
+      f"({'artifact cache hit' if artifacts is not None else 'trained, artifact cache miss'})")
 
 def predict_random():
-    if len(random_df) < WINDOW_SIZE:
+    if NUM_TEST_ROWS < WINDOW_SIZE:
         return "Not enough rows in the dataset to form a sequence of 5.", pd.DataFrame()
-    start_idx = np.random.randint(0, len(random_df) - WINDOW_SIZE + 1)
+    start_idx = np.random.randint(0, NUM_TEST_ROWS - WINDOW_SIZE + 1)
     return predict_by_index(start_idx)
 
 def predict_by_index(start_idx):
-    if start_idx < 0 or start_idx > len(random_df) - WINDOW_SIZE:
+    if start_idx < 0 or start_idx > NUM_TEST_ROWS - WINDOW_SIZE:
         return f"Invalid start index: {start_idx}", pd.DataFrame()
-    seq = random_X_scaled[start_idx:start_idx+WINDOW_SIZE]
-    try:
-        features = seq.reshape(1, WINDOW_SIZE, NUM_FEATURES)
-    except Exception as e:
-        return f"Error reshaping input: {e}\nFeature shape: {seq.shape}", pd.DataFrame()
-    pred = model.predict(features)
-    pred_label = np.argmax(pred, axis=1)[0]
+    pred = test_probs[start_idx]
+    pred_label = int(test_pred_labels[start_idx])
     pred_label_display = label_map.get(pred_label, pred_label)
     confidence = float(np.max(pred)) * 100
-    last_row = random_df.iloc[start_idx+WINDOW_SIZE-1]
-    original_label = last_row['Activity']
-    row_number = last_row.name
+    row_number = start_idx + WINDOW_SIZE - 1
+    original_label = y_test[row_number]
 
     # Update prediction history (keep last 10)
     prediction_history.append({
@@ -128,7 +191,7 @@ def predict_by_index(start_idx):
 # --- Exploratory Data Analysis (EDA) ---
 def plot_activity_distribution():
     plt.figure(figsize=(8,4))
-    train_df['Activity'].value_counts().plot(kind='bar', color='#43aa8b')
+    pd.Series(y_train).value_counts().plot(kind='bar', color='#43aa8b')
     plt.title('Activity Distribution in Training Set')
     plt.xlabel('Activity')
     plt.ylabel('Count')
@@ -141,8 +204,7 @@ def plot_activity_distribution():
     return img
 
 def plot_confusion_matrix():
-    y_pred = model.predict(X_test_seq)
-    y_pred_labels = np.argmax(y_pred, axis=1)
+    y_pred_labels = test_pred_labels
     cm = confusion_matrix(y_test_seq, y_pred_labels)
     plt.figure(figsize=(7,6))
     plt.imshow(cm, interpolation='nearest', cmap=plt.cm.Blues)
@@ -163,8 +225,7 @@ def plot_confusion_matrix():
     return img
 
 def plot_per_class_accuracy():
-    y_pred = model.predict(X_test_seq)
-    y_pred_labels = np.argmax(y_pred, axis=1)
+    y_pred_labels = test_pred_labels
     accs = []
     for i, label in enumerate(le.classes_):
         idx = (y_test_seq == i)
@@ -187,7 +248,7 @@ def plot_per_class_accuracy():
 
 
 def show_feature_stats():
-    desc = train_df[feature_columns].describe().T[['mean', 'std', 'min', 'max']]
+    desc = as_frame(X_train, feature_columns).describe().T[['mean', 'std', 'min', 'max']]
     return desc.to_html(classes='table table-striped', float_format='%.2f')
 
 with gr.Blocks(theme=gr.themes.Soft()) as demo:
@@ -204,50 +265,33 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
             )
         with gr.Row():
             predict_btn = gr.Button("Predict Random", elem_id="predict-btn", variant="primary")
-            seq_slider = gr.Slider(minimum=0, maximum=len(random_df)-WINDOW_SIZE, step=1, value=0, label="Select Start Row for Sequence")
+            seq_slider = gr.Slider(minimum=0, maximum=NUM_TEST_ROWS-WINDOW_SIZE, step=1, value=0, label="Select Start Row for Sequence")
             predict_by_idx_btn = gr.Button("Predict by Row", variant="secondary")
         with gr.Row():
             gr.Markdown("""#### Or upload your own CSV for batch prediction""")
             file_upload = gr.File(label="Upload CSV File", file_types=[".csv"])
             upload_output = gr.Dataframe(label="Batch Prediction Results")
+            upload_download = gr.File(label="Download All Predictions")
         predict_btn.click(fn=lambda: predict_random(), outputs=[output, history])
         predict_by_idx_btn.click(fn=lambda idx: predict_by_index(int(idx)), inputs=seq_slider, outputs=[output, history])
-        def batch_predict_from_csv(file):
+        def batch_predict_from_csv(file, progress=gr.Progress()):
             if file is None:
-                return pd.DataFrame({"Error": ["No file uploaded."]})
+                return pd.DataFrame({"Error": ["No file uploaded."]}), None
+            # Stream the upload in chunks and write every prediction to a results file;
+            # only the first BATCH_PREVIEW_ROWS rows are read back for display
+            out_path = os.path.join(tempfile.mkdtemp(), "batch_predictions.csv")
             try:
-                df = pd.read_csv(file.name)
+                write_csv_predictions(
+                    file.name, out_path, model, preprocessor, feature_columns, le.classes_, WINDOW_SIZE,
+                    progress=lambda rows: progress((rows, None), desc="Predicting", unit="rows"),
+                )
+            except ValueError as e:
+                return pd.DataFrame({"Error": [str(e)]}), None
             except Exception as e:
-                return pd.DataFrame({"Error": [f"Failed to read CSV: {e}"]})
-            # Check for required columns
-            missing_cols = [col for col in feature_columns if col not in df.columns]
-            if missing_cols:
-                return pd.DataFrame({"Error": [f"Missing columns: {', '.join(missing_cols)}"]})
-            if len(df) < WINDOW_SIZE:
-                return pd.DataFrame({"Error": [f"Not enough rows (need at least {WINDOW_SIZE})"]})
-            # Preprocess
-            X = df[feature_columns]
-            X_scaled = scaler.transform(X)
-            # Create sequences
-            X_seq = []
-            for i in range(len(X_scaled) - WINDOW_SIZE + 1):
-                X_seq.append(X_scaled[i:i+WINDOW_SIZE])
-            X_seq = np.array(X_seq)
-            # Predict
-            preds = model.predict(X_seq)
-            pred_labels = np.argmax(preds, axis=1)
-            confidences = np.max(preds, axis=1) * 100
-            # Prepare output
-            results = []
-            for i, (pl, conf) in enumerate(zip(pred_labels, confidences)):
-                row_idx = i + WINDOW_SIZE - 1
-                results.append({
-                    "Row": row_idx,
-                    "Predicted": label_map.get(pl, pl),
-                    "Confidence (%)": f"{conf:.2f}",
-                })
-            return pd.DataFrame(results)
-        file_upload.change(fn=batch_predict_from_csv, inputs=file_upload, outputs=upload_output)
+                return pd.DataFrame({"Error": [f"Failed to read CSV: {e}"]}), None
+            preview = pd.read_csv(out_path, nrows=BATCH_PREVIEW_ROWS, dtype={"Confidence (%)": str})
+            return preview, out_path
+        file_upload.change(fn=batch_predict_from_csv, inputs=file_upload, outputs=[upload_output, upload_download])
     with gr.Tab("EDA: Activity Distribution"):
         gr.Markdown("""### Activity Distribution in Training Set""")
         gr.Image(value=plot_activity_distribution(), label="Activity Distribution")
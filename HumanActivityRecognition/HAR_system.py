@@ -10,29 +10,45 @@ from tensorflow.keras.layers import Conv1D, MaxPooling1D, LSTM, Dense, Dropout
 from tensorflow.keras.utils import to_categorical
 import joblib
 import json
+import os
 from datetime import datetime
+from sample_pool import SamplePool
+from inference_scheduler import InferenceScheduler
+from model_export import export_runtimes
+from input_pipeline import feature_columns_for, compute_stats, make_dataset
+from dataset_cache import load_dataset, fill_missing, as_frame
+from feature_reduction import fit_reducer, save_reducer
+from cascade import (MAX_ACCURACY_DROP, ModelCascade, fit_first_stage, first_stage_proba,
+                     calibrate_threshold, evaluate_cascade, save_cascade, print_report)
 
 class HARSystem:
-    def __init__(self):
+    def __init__(self, reduction='none', n_components=64):
         self.ctgan = None
         self.hybrid_model = None
         self.scaler = StandardScaler()
+        # Optional PCA / feature selection after scaling (see feature_reduction.py)
+        self.reduction = reduction
+        self.n_components = n_components
+        self.reducer = None
         self.label_encoder = LabelEncoder()
         self.feature_columns = None
+        self.sample_pool = None
+        self.inference_scheduler = None
+        self.cascade = None
+        self.cascade_report = None
         
     def prepare_data(self, csv_path):
         """Load and prepare data for training"""
         print("Loading and preparing data...")
-        df = pd.read_csv(csv_path)
-        
-        # Remove subject column if present
-        if 'subject' in df.columns:
-            df = df.drop(columns=['subject'])
-            
-        # Separate features and target
-        self.feature_columns = [col for col in df.columns if col != 'Activity']
-        X = df[self.feature_columns]  # Only sensor features
-        y = df['Activity']  # Target variable
+        # float32 features parsed once per CSV version, then memory-mapped (subject dropped)
+        dataset = load_dataset(csv_path)
+        self.feature_columns = dataset['feature_columns']
+        features = dataset['X']
+        if dataset['missing_values']:
+            features = fill_missing(features, dataset['column_means'])
+
+        X = as_frame(features, self.feature_columns)  # Only sensor features
+        y = pd.Series(dataset['y'], name='Activity')  # Target variable
         
         return X, y
     
@@ -81,7 +97,7 @@ class HARSystem:
         
         return model
     
-    def train_hybrid_model(self, X, y, validation_split=0.2, epochs=100):
+    def train_hybrid_model(self, X, y, validation_split=0.2, epochs=100, batch_size=32):
         """Train the hybrid model for activity recognition"""
         print("Preparing data for hybrid model training...")
         
@@ -92,6 +108,11 @@ class HARSystem:
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
         
+        # Reduce to n_components features when a reduction is configured
+        self.reducer = fit_reducer(X_scaled, y_encoded, self.reduction, self.n_components)
+        if self.reducer is not None:
+            X_scaled = self.reducer.transform(X_scaled)
+        
         # Reshape for CNN-LSTM (samples, time_steps, features)
         # For this example, treating each sample as a single time step
         X_reshaped = X_scaled.reshape((X_scaled.shape[0], 1, X_scaled.shape[1]))
@@ -109,6 +130,9 @@ class HARSystem:
         num_classes = len(np.unique(y_encoded))
         
         self.hybrid_model = self.create_hybrid_model(input_shape, num_classes)
+        # A cascade fitted in front of a previous model no longer applies
+        self.cascade = None
+        self.cascade_report = None
         
         print("Training hybrid model...")
         
@@ -123,7 +147,54 @@ class HARSystem:
             X_train, y_train,
             validation_data=(X_val, y_val),
             epochs=epochs,
-            batch_size=32,
+            batch_size=batch_size,
+            callbacks=callbacks,
+            verbose=1
+        )
+        
+        print("Hybrid model training completed!")
+        return history
+    
+    def train_hybrid_model_streaming(self, data_paths, validation_split=0.2, epochs=100,
+                                     batch_size=256, shuffle_buffer=10000, chunksize=10000):
+        """Train the hybrid model from CSV/Parquet shards without loading them into memory"""
+        if self.reduction != 'none':
+            raise ValueError("Feature reduction needs the in-memory train_hybrid_model path")
+        print("Computing feature statistics over training shards...")
+        
+        # One streaming pass for scaler statistics and the label set
+        self.feature_columns = feature_columns_for(data_paths[0])
+        self.scaler, classes = compute_stats(data_paths, self.feature_columns, chunksize)
+        self.label_encoder.fit(classes)
+        
+        # Lazily scaled, windowed, shuffled and prefetched batches
+        datasets = {
+            subset: make_dataset(
+                data_paths, self.feature_columns, self.scaler, self.label_encoder.classes_,
+                window_size=1, batch_size=batch_size, shuffle_buffer=shuffle_buffer,
+                validation_split=validation_split, subset=subset, chunksize=chunksize
+            )
+            for subset in ('training', 'validation')
+        }
+        
+        input_shape = (1, len(self.feature_columns))
+        num_classes = len(self.label_encoder.classes_)
+        self.hybrid_model = self.create_hybrid_model(input_shape, num_classes)
+        # A cascade fitted in front of a previous model no longer applies
+        self.cascade = None
+        self.cascade_report = None
+        
+        print("Training hybrid model (streaming)...")
+        
+        callbacks = [
+            tf.keras.callbacks.EarlyStopping(patience=15, restore_best_weights=True),
+            tf.keras.callbacks.ReduceLROnPlateau(patience=7, factor=0.5),
+        ]
+        
+        history = self.hybrid_model.fit(
+            datasets['training'],
+            validation_data=datasets['validation'],
+            epochs=epochs,
             callbacks=callbacks,
             verbose=1
         )
@@ -131,6 +202,60 @@ class HARSystem:
         print("Hybrid model training completed!")
         return history
     
+    def fit_cascade(self, X, y, validation_split=0.2, max_accuracy_drop=MAX_ACCURACY_DROP):
+        """
+        Put a linear first stage in front of the hybrid model: windows it classifies
+        confidently skip the CNN-LSTM. The threshold is calibrated on half of the hybrid
+        model's validation rows and the report comes from the other half
+        """
+        if self.hybrid_model is None:
+            raise ValueError("Hybrid model not trained yet!")
+        print("Fitting first-stage classifier...")
+        
+        y_encoded = self.label_encoder.transform(y)
+        X_scaled = self._model_features(X)
+        X_reshaped = X_scaled.reshape((X_scaled.shape[0], 1, X_scaled.shape[1]))
+        
+        # Same split as train_hybrid_model
+        X_train, X_val, y_train, y_val = train_test_split(
+            X_reshaped, y_encoded,
+            test_size=validation_split,
+            random_state=42,
+            stratify=y_encoded
+        )
+        X_cal, X_eval, y_cal, y_eval = train_test_split(
+            X_val, y_val, test_size=0.5, random_state=42, stratify=y_val
+        )
+        
+        first_stage = fit_first_stage(X_train, y_train)
+        num_classes = len(self.label_encoder.classes_)
+        threshold = calibrate_threshold(
+            first_stage_proba(first_stage, X_cal, num_classes),
+            self._predict_hybrid(X_cal), y_cal, max_accuracy_drop
+        )
+        self.cascade = ModelCascade(first_stage, self._predict_hybrid, threshold, num_classes)
+        self.cascade_report = evaluate_cascade(self.cascade, self._predict_hybrid, X_eval, y_eval)
+        print_report(self.cascade_report)
+        return self.cascade_report
+    
+    def enable_sample_pool(self, low_water=500, high_water=2000, refill_batch=1000):
+        """Serve generate_synthetic_data from a background-refilled pool of GAN samples"""
+        if self.ctgan is None:
+            raise ValueError("GAN not trained yet!")
+        if self.sample_pool is not None:
+            self.sample_pool.close()
+        self.sample_pool = SamplePool(self.ctgan.sample, low_water, high_water, refill_batch)
+        return self.sample_pool
+    
+    def enable_inference_scheduler(self, max_batch_size=256, max_wait_ms=5.0):
+        """Batch concurrent predict_activities calls into shared forward passes"""
+        if self.hybrid_model is None:
+            raise ValueError("Hybrid model not trained yet!")
+        if self.inference_scheduler is not None:
+            self.inference_scheduler.close()
+        self.inference_scheduler = InferenceScheduler(self.hybrid_model, max_batch_size, max_wait_ms)
+        return self.inference_scheduler
+    
     def generate_synthetic_data(self, num_samples=5):
         """Generate synthetic sensor data (simulating device input)"""
         if self.ctgan is None:
@@ -139,7 +264,10 @@ class HARSystem:
         print(f"Generating {num_samples} synthetic sensor samples...")
         
         # Generate only sensor features (no Activity column)
-        synthetic_data = self.ctgan.sample(num_samples)
+        if self.sample_pool is not None:
+            synthetic_data = self.sample_pool.sample(num_samples)
+        else:
+            synthetic_data = self.ctgan.sample(num_samples)
         
         # Add realistic timestamps
         synthetic_data['timestamp'] = pd.date_range(
@@ -154,6 +282,17 @@ class HARSystem:
         
         return synthetic_data
     
+    def _model_features(self, X):
+        """Scaled features, reduced when a reducer was fitted: what the hybrid model sees"""
+        X_scaled = self.scaler.transform(X)
+        return X_scaled if self.reducer is None else self.reducer.transform(X_scaled)
+    
+    def _predict_hybrid(self, input_data):
+        """CNN-LSTM probabilities, through the inference scheduler when one is enabled"""
+        if self.inference_scheduler is not None:
+            return self.inference_scheduler.predict(input_data)
+        return self.hybrid_model.predict(input_data, verbose=0)
+    
     def predict_activities(self, synthetic_data):
         """Predict activities from synthetic sensor data"""
         if self.hybrid_model is None:
@@ -167,14 +306,17 @@ class HARSystem:
         # Ensure column order matches training data
         sensor_data = sensor_data[self.feature_columns]
         
-        # Scale data
-        scaled_data = self.scaler.transform(sensor_data)
+        # Scale (and reduce) data
+        scaled_data = self._model_features(sensor_data)
         
         # Reshape for model input
         input_data = scaled_data.reshape((scaled_data.shape[0], 1, scaled_data.shape[1]))
         
-        # Make predictions
-        predictions = self.hybrid_model.predict(input_data, verbose=0)
+        # Make predictions (only low-confidence rows reach the CNN-LSTM when the cascade is fitted)
+        if self.cascade is not None:
+            predictions = self.cascade.predict(input_data)
+        else:
+            predictions = self._predict_hybrid(input_data)
         predicted_classes = np.argmax(predictions, axis=1)
         confidence_scores = np.max(predictions, axis=1)
         
@@ -208,27 +350,40 @@ class HARSystem:
         
         return predictions, sensor_data
     
-    def save_models(self, save_dir='models'):
-        """Save all trained models and preprocessors"""
-        import os
+    def save_gan(self, save_dir='models'):
+        """Save the GAN"""
         os.makedirs(save_dir, exist_ok=True)
-        
-        # Save GAN
         if self.ctgan:
             self.ctgan.save(f"{save_dir}/ctgan_model.pkl")
-            
-        # Save hybrid model
+    
+    def save_classifier(self, save_dir='models'):
+        """Save the hybrid model, its cascade and the preprocessors it was trained with"""
+        os.makedirs(save_dir, exist_ok=True)
+        
+        # Save hybrid model, plus TFLite / NumPy exports for TensorFlow-free serving
         if self.hybrid_model:
             self.hybrid_model.save(f"{save_dir}/hybrid_model.h5")
+            export_runtimes(self.hybrid_model, save_dir)
+        
+        # Save the cascade's first stage and calibrated threshold (or remove a stale one)
+        if self.cascade:
+            save_cascade(save_dir, self.cascade.first_stage, self.cascade.threshold, self.cascade_report)
+        else:
+            save_cascade(save_dir, None)
             
         # Save preprocessors
         joblib.dump(self.scaler, f"{save_dir}/scaler.pkl")
+        save_reducer(save_dir, self.reducer)
         joblib.dump(self.label_encoder, f"{save_dir}/label_encoder.pkl")
         
         # Save feature columns
         with open(f"{save_dir}/feature_columns.json", 'w') as f:
             json.dump(self.feature_columns, f)
-            
+    
+    def save_models(self, save_dir='models'):
+        """Save all trained models and preprocessors"""
+        self.save_gan(save_dir)
+        self.save_classifier(save_dir)
         print(f"All models saved to {save_dir}/")
 
 # Example usage
@@ -245,6 +400,9 @@ if __name__ == "__main__":
     # Train hybrid model (for activity prediction)
     har_system.train_hybrid_model(X, y, epochs=20)  # Reduced for demo
     
+    # Cheap first stage in front of the hybrid model for confident windows
+    har_system.fit_cascade(X, y)
+    
     # Save models
     har_system.save_models()
     
@@ -1,14 +1,23 @@
 #app.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 import joblib
 import json
-from datetime import datetime, timedelta
-import tensorflow as tf
-from ctgan import CTGAN
+import os
+from datetime import datetime
 import logging
+import threading
+import time
+from model_registry import ModelRegistry
+from serialization import serialize_samples, RESPONSE_FORMATS
+from sample_pool import SamplePool
+from inference_scheduler import InferenceScheduler
+from model_export import load_inference_model
+from stream_sessions import StreamSessions
+from cascade import ModelCascade, load_cascade
+from feature_reduction import load_preprocessor
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -17,41 +26,147 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React Native
 
-# Global variables to hold loaded models
-ctgan_model = None
-hybrid_model = None
-scaler = None
-label_encoder = None
-feature_columns = None
-
-def load_models():
-    """Load all trained models and preprocessors"""
-    global ctgan_model, hybrid_model, scaler, label_encoder, feature_columns
-    
-    try:
-        # Load GAN model
-        ctgan_model = CTGAN.load('models/ctgan_model.pkl')
-        logger.info("✅ GAN model loaded successfully")
-        
-        # Load hybrid model
-        hybrid_model = tf.keras.models.load_model('models/hybrid_model.h5')
-        logger.info("✅ Hybrid model loaded successfully")
-        
-        # Load preprocessors
-        scaler = joblib.load('models/scaler.pkl')
-        label_encoder = joblib.load('models/label_encoder.pkl')
-        logger.info("✅ Preprocessors loaded successfully")
-        
-        # Load feature columns
-        with open('models/feature_columns.json', 'r') as f:
-            feature_columns = json.load(f)
-        logger.info("✅ Feature columns loaded successfully")
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"❌ Error loading models: {str(e)}")
-        return False
+MODEL_DIR = 'models'
+
+# Pre-sampled GAN rows kept in memory for /api/generate-data (high water 0 disables the pool)
+SAMPLE_POOL_LOW_WATER = int(os.environ.get('HAR_SAMPLE_POOL_LOW_WATER', '500'))
+SAMPLE_POOL_HIGH_WATER = int(os.environ.get('HAR_SAMPLE_POOL_HIGH_WATER', '2000'))
+SAMPLE_POOL_REFILL_BATCH = int(os.environ.get('HAR_SAMPLE_POOL_REFILL_BATCH', '1000'))
+
+# Hybrid model runtime: auto (standalone TFLite > NumPy > Keras), tflite, numpy or keras
+INFERENCE_RUNTIME = os.environ.get('HAR_INFERENCE_RUNTIME', 'auto')
+# TFLite / TensorFlow threads for the hybrid model (0 = framework default); serve_prefork.py
+# sets it per worker
+INFERENCE_THREADS = int(os.environ.get('HAR_INFERENCE_THREADS', '0'))
+
+# Concurrent predict requests are merged into one forward pass of up to this many rows,
+# waiting at most this long for the batch to fill
+INFERENCE_MAX_BATCH_SIZE = int(os.environ.get('HAR_INFERENCE_MAX_BATCH_SIZE', '256'))
+INFERENCE_MAX_WAIT_MS = float(os.environ.get('HAR_INFERENCE_MAX_WAIT_MS', '5'))
+
+# Confident rows are answered by the first-stage classifier saved next to the model
+# (cascade.py) and only the rest reach the CNN-LSTM: auto (when exported) or off
+CASCADE = os.environ.get('HAR_CASCADE', 'auto')
+
+# Streaming sessions: readings per prediction window, readings between predictions,
+# model input steps (1 = per-reading model, averaged over the window) and idle eviction
+STREAM_WINDOW_SIZE = int(os.environ.get('HAR_STREAM_WINDOW_SIZE', '5'))
+STREAM_STRIDE = int(os.environ.get('HAR_STREAM_STRIDE', '1'))
+STREAM_TIMESTEPS = int(os.environ.get('HAR_STREAM_TIMESTEPS', '1'))
+STREAM_IDLE_TIMEOUT = float(os.environ.get('HAR_STREAM_IDLE_TIMEOUT', '300'))
+# Worker processes serving the app, set by serve_prefork.py / gunicorn.conf.py. Stream
+# sessions live in one worker's memory and the workers share one socket, so a device's
+# requests would be spread over several partial sessions: the stream routes are refused
+# when this is above 1 (run a single-worker instance for streaming instead)
+SERVING_WORKERS = 1
+
+# Artifacts each route needs before it can serve traffic
+PREDICTION_MODELS = ['predictor', 'preprocessor', 'label_encoder', 'feature_columns']
+STREAM_MODELS = ['stream_sessions', 'preprocessor', 'label_encoder', 'feature_columns']
+GENERATION_MODELS = ['sample_pool' if SAMPLE_POOL_HIGH_WATER > 0 else 'ctgan_model', 'feature_columns']
+
+# Seconds a request waits for a model that is still loading before answering 503
+MODEL_WAIT_TIMEOUT = float(os.environ.get('HAR_MODEL_WAIT_TIMEOUT', '0'))
+# Seconds before a model that failed to load is tried again (on the next request or readiness probe)
+MODEL_RETRY_AFTER = float(os.environ.get('HAR_MODEL_RETRY_AFTER', '5'))
+
+# TensorFlow and ctgan are imported inside their loaders so that importing this module
+# stays cheap and each heavy import happens on the thread that needs it (TensorFlow is
+# not imported at all when the NumPy export, or a TFLite export through tflite_runtime /
+# ai_edge_litert, serves the hybrid model)
+# Unpickling sklearn objects imports sklearn; two loader threads importing it at once can
+# trip the import system's deadlock detection, so pickles are loaded one at a time
+_unpickle_lock = threading.Lock()
+
+def _unpickled(loader, *args):
+    with _unpickle_lock:
+        return loader(*args)
+
+def _load_ctgan():
+    from ctgan import CTGAN
+    return CTGAN.load(f'{MODEL_DIR}/ctgan_model.pkl')
+
+def _load_hybrid_model():
+    # TFLite or the NumPy forward pass when exported; full Keras only as a fallback
+    return load_inference_model(MODEL_DIR, runtime=INFERENCE_RUNTIME, num_threads=INFERENCE_THREADS or None)
+
+def _load_feature_columns():
+    with open(f'{MODEL_DIR}/feature_columns.json', 'r') as f:
+        return json.load(f)
+
+def _load_sample_pool():
+    # Runs on the loader pool too; waits for the GAN, which never waits on anything
+    ctgan_model = models.get('ctgan_model', timeout=None)
+    if ctgan_model is None:
+        raise RuntimeError("GAN model failed to load")
+    return SamplePool(ctgan_model.sample, low_water=SAMPLE_POOL_LOW_WATER,
+                      high_water=SAMPLE_POOL_HIGH_WATER, refill_batch=SAMPLE_POOL_REFILL_BATCH)
+
+def _load_inference_scheduler():
+    hybrid_model = models.get('hybrid_model', timeout=None)
+    if hybrid_model is None:
+        raise RuntimeError("Hybrid model failed to load")
+    return InferenceScheduler(hybrid_model, max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+                              max_wait_ms=INFERENCE_MAX_WAIT_MS)
+
+def _load_predictor():
+    # The scheduler stays the second stage, so rows the cascade escalates are still batched
+    scheduler = models.get('inference_scheduler', timeout=None)
+    label_encoder = models.get('label_encoder', timeout=None)
+    if scheduler is None or label_encoder is None:
+        raise RuntimeError("Prediction models failed to load")
+    cascade = None
+    if CASCADE != 'off':
+        cascade = _unpickled(load_cascade, MODEL_DIR, scheduler.predict, len(label_encoder.classes_))
+    return cascade if cascade is not None else scheduler
+
+def _load_stream_sessions():
+    predictor = models.get('predictor', timeout=None)
+    preprocessor = models.get('preprocessor', timeout=None)
+    label_encoder = models.get('label_encoder', timeout=None)
+    if predictor is None or preprocessor is None or label_encoder is None:
+        raise RuntimeError("Prediction models failed to load")
+    # Sessions buffer model features, i.e. the reduced width when a reducer is in use
+    return StreamSessions(predictor.predict, preprocessor.n_features_out, len(label_encoder.classes_),
+                          window_size=STREAM_WINDOW_SIZE, stride=STREAM_STRIDE,
+                          timesteps=STREAM_TIMESTEPS, idle_timeout=STREAM_IDLE_TIMEOUT)
+
+models = ModelRegistry(max_workers=8, retry_after=MODEL_RETRY_AFTER)
+models.register('ctgan_model', _load_ctgan)
+models.register('hybrid_model', _load_hybrid_model)
+# Scaler plus the optional PCA / feature-selection stage the model was trained with
+models.register('preprocessor', lambda: _unpickled(load_preprocessor, MODEL_DIR))
+models.register('label_encoder', lambda: _unpickled(joblib.load, f'{MODEL_DIR}/label_encoder.pkl'))
+models.register('feature_columns', _load_feature_columns)
+models.register('inference_scheduler', _load_inference_scheduler)
+models.register('predictor', _load_predictor)
+models.register('stream_sessions', _load_stream_sessions)
+if SAMPLE_POOL_HIGH_WATER > 0:
+    models.register('sample_pool', _load_sample_pool)
+
+def load_models(names=None):
+    """Start loading models and preprocessors in parallel in the background"""
+    models.load(names)
+
+def _require(names):
+    """Fetch the named artifacts, or return a 503 response if any is not ready yet"""
+    loaded = {name: models.get(name, timeout=MODEL_WAIT_TIMEOUT) for name in names}
+    missing = [name for name, value in loaded.items() if value is None]
+    if missing:
+        return None, (jsonify({
+            'error': f"Models not ready: {', '.join(missing)}",
+            'models': {name: models.status()[name] for name in missing}
+        }), 503)
+    return loaded, None
+
+def _require_stream(names):
+    """_require for the stream routes, which need every request of a device in one process"""
+    if SERVING_WORKERS > 1:
+        return None, (jsonify({
+            'error': f"Streaming sessions are not available with {SERVING_WORKERS} workers; "
+                     f"use a single-worker server for /api/stream"
+        }), 503)
+    return _require(names)
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -59,13 +174,50 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'models_loaded': all([
-            ctgan_model is not None,
-            hybrid_model is not None,
-            scaler is not None,
-            label_encoder is not None,
-            feature_columns is not None
-        ])
+        'models_loaded': models.is_loaded(),
+        'models': models.status()
+    })
+
+@app.route('/api/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'status': 'alive', 'timestamp': datetime.now().isoformat()})
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness: 200 once the prediction route can serve, even if the GAN is still loading.
+    Per-route readiness and per-model load status/time are included in the body.
+    Probes also retry models whose load failed, so a transient failure does not stick
+    """
+    models.load()
+    routes = {
+        'predict-activities': models.is_loaded(*PREDICTION_MODELS),
+        'stream': SERVING_WORKERS == 1 and models.is_loaded(*STREAM_MODELS),
+        'generate-data': models.is_loaded(*GENERATION_MODELS),
+    }
+    ready = routes['predict-activities']
+    return jsonify({
+        'status': 'ready' if ready else 'loading',
+        'timestamp': datetime.now().isoformat(),
+        'routes': routes,
+        'models': models.status()
+    }), 200 if ready else 503
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Runtime metrics for the serving components"""
+    pool = models.get('sample_pool', timeout=0) if SAMPLE_POOL_HIGH_WATER > 0 else None
+    scheduler = models.get('inference_scheduler', timeout=0)
+    sessions = models.get('stream_sessions', timeout=0)
+    predictor = models.get('predictor', timeout=0)
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'pid': os.getpid(),
+        'sample_pool': pool.metrics() if pool is not None else None,
+        'inference_scheduler': scheduler.stats() if scheduler is not None else None,
+        'cascade': predictor.stats() if isinstance(predictor, ModelCascade) else None,
+        'stream_sessions': sessions.stats() if sessions is not None else None
     })
 
 @app.route('/api/generate-data', methods=['POST'])
@@ -75,33 +227,197 @@ def generate_synthetic_data():
     This simulates data coming from a wearable device
     """
     try:
-        if ctgan_model is None:
-            return jsonify({'error': 'GAN model not loaded'}), 500
-            
+        loaded, error = _require(GENERATION_MODELS)
+        if error:
+            return error
+        sampler = loaded['sample_pool'] if 'sample_pool' in loaded else loaded['ctgan_model']
+        feature_columns = loaded['feature_columns']
+
         # Get parameters from request
         data = request.get_json()
         num_samples = data.get('num_samples', 5)
         simulate_device = data.get('simulate_device', True)
-        
+        response_format = data.get('format', 'records')
+        if response_format not in RESPONSE_FORMATS:
+            return jsonify({'error': f"Unknown format '{response_format}'", 'formats': list(RESPONSE_FORMATS)}), 400
+
         logger.info(f"🔄 Generating {num_samples} synthetic sensor samples...")
-        
+
         # Generate synthetic sensor data (NO Activity column)
-        synthetic_data = ctgan_model.sample(num_samples)
-        
-        # Convert to list of dictionaries for JSON response
-        sensor_data = []
-        
-        for i in range(len(synthetic_data)):
-            # Create timestamp (simulating real-time data)
-            timestamp = datetime.now() + timedelta(milliseconds=i*100)  # 10Hz
-            
-            # Create sample dictionary
-            sample = {
-                'timestamp': timestamp.isoformat(),
-                'sample_id': i + 1
+        synthetic_data = sampler.sample(num_samples)
+
+        # Serialize the whole block at once (records by default, or a compact layout)
+        sensor_data = serialize_samples(synthetic_data, feature_columns, fmt=response_format)
+
+        return jsonify({
+            'success': True,
+            'sensor_data': sensor_data,
+            'metadata': {
+                'num_samples': num_samples,
+                'timestamp_generated': datetime.now().isoformat(),
+                'sampling_rate': '10Hz',
+                'format': response_format,
+                'features': feature_columns
             }
-            
-            # Add sensor features
-            for col in feature_columns:
-                if col in synthetic_data.columns:
-                    value = synthetic
+        })
+
+    except Exception as e:
+        logger.error(f"❌ Error generating synthetic data: {str(e)}")
+        return jsonify({'error': f'Data generation failed: {str(e)}'}), 500
+
+@app.route('/api/predict-activities', methods=['POST'])
+def predict_activities():
+    """
+    Predict activities from provided sensor data
+    """
+    try:
+        loaded, error = _require(PREDICTION_MODELS)
+        if error:
+            return error
+        predictor = loaded['predictor']
+        preprocessor = loaded['preprocessor']
+        label_encoder = loaded['label_encoder']
+        feature_columns = loaded['feature_columns']
+
+        # Get sensor data from request
+        data = request.get_json()
+        sensor_data = data.get('sensor_data', [])
+
+        if not sensor_data:
+            return jsonify({'error': 'No sensor data provided'}), 400
+
+        logger.info(f"🎯 Predicting activities for {len(sensor_data)} samples...")
+
+        # Convert to DataFrame
+        df = pd.DataFrame(sensor_data)
+
+        # Remove timestamp and sample_id columns for prediction
+        prediction_columns = [col for col in df.columns if col not in ['timestamp', 'sample_id']]
+        sensor_features = df[prediction_columns]
+
+        # Ensure column order matches training data
+        sensor_features = sensor_features[feature_columns]
+
+        # Scale (and reduce) data
+        scaled_data = preprocessor.transform(sensor_features)
+
+        # Reshape for model input
+        input_data = scaled_data.reshape((scaled_data.shape[0], 1, scaled_data.shape[1]))
+
+        # Make predictions (confident rows stop at the first stage; the rest are
+        # batched with other in-flight requests)
+        predictions = predictor.predict(input_data)
+        predicted_classes = np.argmax(predictions, axis=1)
+        confidence_scores = np.max(predictions, axis=1)
+
+        # Convert back to activity names
+        predicted_activities = label_encoder.inverse_transform(predicted_classes)
+
+        # Create results
+        results = []
+        for i in range(len(sensor_data)):
+            results.append({
+                'timestamp': sensor_data[i].get('timestamp'),
+                'predicted_activity': predicted_activities[i],
+                'confidence': float(confidence_scores[i]),
+                'sample_id': sensor_data[i].get('sample_id', i + 1)
+            })
+
+        return jsonify({
+            'success': True,
+            'predictions': results,
+            'summary': {
+                'total_samples': len(results),
+                'average_confidence': float(np.mean(confidence_scores)),
+                'activities_detected': list(set(predicted_activities))
+            }
+        })
+
+    except Exception as e:
+        logger.error(f"❌ Error predicting activities: {str(e)}")
+        return jsonify({'error': f'Prediction failed: {str(e)}'}), 500
+
+def _scale_readings(readings, feature_columns, preprocessor):
+    """
+    Readings as dicts keyed by feature name (like /api/predict-activities) or as plain
+    lists in feature_columns order -> scaled (and reduced) float32 rows, plus each
+    reading's timestamp
+    """
+    rows = [[reading[col] for col in feature_columns] if isinstance(reading, dict) else reading
+            for reading in readings]
+    X = np.asarray(rows, dtype=np.float32)
+    if X.ndim != 2 or X.shape[1] != len(feature_columns):
+        raise ValueError(f"Each reading needs {len(feature_columns)} features")
+    # Scaling and reduction folded into one float32 step: no DataFrame, no float64 copy
+    X = preprocessor.transform_array(X)
+    timestamps = [reading.get('timestamp') if isinstance(reading, dict) else None for reading in readings]
+    return X, timestamps
+
+@app.route('/api/stream/<device_id>', methods=['POST'])
+def stream_readings(device_id):
+    """
+    Stream readings for one device and receive predictions as they become due.
+    The request body is newline-delimited JSON (one reading, or a list of readings, per
+    line) and may be sent with chunked transfer encoding over one long-lived request;
+    the response streams one JSON prediction per line. The device's window carries over
+    between requests until the session is ended or idles out
+    """
+    loaded, error = _require_stream(STREAM_MODELS)
+    if error:
+        return error
+    sessions = loaded['stream_sessions']
+    preprocessor = loaded['preprocessor']
+    classes = loaded['label_encoder'].classes_
+    feature_columns = loaded['feature_columns']
+
+    def generate():
+        for line in request.stream:
+            if not line.strip():
+                continue
+            arrival = time.perf_counter()
+            try:
+                payload = json.loads(line)
+                is_batch = isinstance(payload, list) and payload and isinstance(payload[0], (dict, list))
+                readings = payload if is_batch else [payload]
+                X, timestamps = _scale_readings(readings, feature_columns, preprocessor)
+                predictions = sessions.add_readings(device_id, X, arrival)
+            except Exception as e:
+                logger.error(f"❌ Stream error for device {device_id}: {str(e)}")
+                yield json.dumps({'error': str(e)}) + '\n'
+                continue
+            for reading_index, row, probs, latency in predictions:
+                yield json.dumps({
+                    'device_id': device_id,
+                    'reading_index': reading_index,
+                    'timestamp': timestamps[row],
+                    'predicted_activity': str(classes[int(np.argmax(probs))]),
+                    'confidence': float(np.max(probs)),
+                    'latency_ms': 1000 * latency
+                }) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/stream/<device_id>', methods=['GET'])
+def stream_session_metrics(device_id):
+    """Per-device session state and reading-to-prediction latency"""
+    loaded, error = _require_stream(['stream_sessions'])
+    if error:
+        return error
+    device = loaded['stream_sessions'].device_metrics(device_id)
+    if device is None:
+        return jsonify({'error': f'No active session for device {device_id}'}), 404
+    return jsonify({'device_id': device_id, **device})
+
+@app.route('/api/stream/<device_id>', methods=['DELETE'])
+def end_stream_session(device_id):
+    loaded, error = _require_stream(['stream_sessions'])
+    if error:
+        return error
+    return jsonify({'device_id': device_id, 'ended': loaded['stream_sessions'].end(device_id)})
+
+if __name__ == '__main__':
+    # Start loading every model in parallel and serve immediately; routes answer 503
+    # until the artifacts they need are ready (see /api/health/ready)
+    load_models()
+    logger.info("🚀 Starting server while models load in the background...")
+    app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
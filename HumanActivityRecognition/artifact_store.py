@@ -0,0 +1,98 @@
+#artifact_store.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+import joblib
+
+# Bump when the model architecture or preprocessing changes so old artifacts are not reused
+ARTIFACT_FORMAT_VERSION = 1
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Hash a file's bytes without loading it all into memory"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def artifact_key(data_paths, hyperparams):
+    """Version key for a training run: hash of the input files plus the hyperparameters"""
+    h = hashlib.sha256()
+    h.update(str(ARTIFACT_FORMAT_VERSION).encode())
+    for path in data_paths:
+        h.update(file_sha256(path).encode())
+    h.update(json.dumps(hyperparams, sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+
+def artifact_dir(store_dir, key):
+    return os.path.join(store_dir, key)
+
+
+def has_artifacts(store_dir, key):
+    return os.path.exists(os.path.join(artifact_dir(store_dir, key), 'meta.json'))
+
+
+def save_artifacts(store_dir, key, model, scaler, label_encoder, feature_columns, fill_means,
+                   hyperparams=None):
+    """
+    Save everything serving needs under store_dir/<key>/.
+    Files are written to a temporary directory first and moved into place, so a crash
+    mid-save never leaves a half-written version behind
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=store_dir, prefix=f".{key}-")
+    try:
+        model.save(os.path.join(tmp_dir, 'model.h5'))
+        joblib.dump(scaler, os.path.join(tmp_dir, 'scaler.pkl'))
+        joblib.dump(label_encoder, os.path.join(tmp_dir, 'label_encoder.pkl'))
+        with open(os.path.join(tmp_dir, 'feature_columns.json'), 'w') as f:
+            json.dump(list(feature_columns), f)
+        with open(os.path.join(tmp_dir, 'fill_means.json'), 'w') as f:
+            json.dump({col: float(val) for col, val in dict(fill_means).items()}, f)
+        # meta.json is written last: its presence marks a complete version
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump({
+                'key': key,
+                'format_version': ARTIFACT_FORMAT_VERSION,
+                'hyperparams': hyperparams or {},
+                'created': datetime.now().isoformat(),
+            }, f, indent=2)
+
+        target = artifact_dir(store_dir, key)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(tmp_dir, target)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    print(f"Artifacts saved to {artifact_dir(store_dir, key)}/")
+
+
+def load_artifacts(store_dir, key):
+    """Load a saved version; returns None when the key is not in the store"""
+    if not has_artifacts(store_dir, key):
+        return None
+    from tensorflow.keras.models import load_model
+
+    path = artifact_dir(store_dir, key)
+    with open(os.path.join(path, 'feature_columns.json')) as f:
+        feature_columns = json.load(f)
+    with open(os.path.join(path, 'fill_means.json')) as f:
+        fill_means = json.load(f)
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+
+    return {
+        'model': load_model(os.path.join(path, 'model.h5')),
+        'scaler': joblib.load(os.path.join(path, 'scaler.pkl')),
+        'label_encoder': joblib.load(os.path.join(path, 'label_encoder.pkl')),
+        'feature_columns': feature_columns,
+        'fill_means': fill_means,
+        'meta': meta,
+    }
@@ -0,0 +1,91 @@
+#batch_stream.py
+import os
+import numpy as np
+import pandas as pd
+from windowing import predict_windows, DEFAULT_CHUNK_SIZE
+
+# Rows read from the uploaded CSV per chunk
+DEFAULT_CSV_CHUNKSIZE = 20000
+
+
+def read_csv_header(csv_path):
+    """Read only the header row of a CSV"""
+    return list(pd.read_csv(csv_path, nrows=0).columns)
+
+
+def format_predictions(rows, probs, class_labels):
+    """Build the Row / Predicted / Confidence (%) result table for a block of windows"""
+    pred_labels = np.argmax(probs, axis=1)
+    confidences = np.max(probs, axis=1) * 100
+    return pd.DataFrame({
+        "Row": rows,
+        "Predicted": np.asarray(class_labels, dtype=object)[pred_labels],
+        "Confidence (%)": [f"{conf:.2f}" for conf in confidences],
+    })
+
+
+def iter_csv_predictions(csv_path, model, scaler, feature_columns, class_labels, window_size,
+                         chunksize=DEFAULT_CSV_CHUNKSIZE, window_chunk_size=DEFAULT_CHUNK_SIZE,
+                         progress=None):
+    """
+    Stream predictions for a CSV of any length.
+    Reads `chunksize` rows at a time, carries the last window_size-1 scaled rows over to
+    the next chunk so windows spanning a chunk boundary are not lost, and yields one
+    result DataFrame per chunk. Rows are numbered exactly like the all-at-once path
+    """
+    missing_cols = [col for col in feature_columns if col not in read_csv_header(csv_path)]
+    if missing_cols:
+        raise ValueError(f"Missing columns: {', '.join(missing_cols)}")
+
+    carry = None
+    rows_read = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, usecols=feature_columns):
+        scaled = scaler.transform(chunk[feature_columns])
+        if carry is not None and len(carry):
+            block = np.concatenate([carry, scaled])
+        else:
+            block = scaled
+        block_start = rows_read - (len(block) - len(scaled))
+        rows_read += len(chunk)
+
+        ends, probs = predict_windows(model, block, window_size, chunk_size=window_chunk_size)
+        if len(ends):
+            yield format_predictions(block_start + ends, probs, class_labels)
+
+        carry = block[max(len(block) - (window_size - 1), 0):]
+        if progress is not None:
+            progress(rows_read)
+
+    if rows_read < window_size:
+        raise ValueError(f"Not enough rows (need at least {window_size})")
+
+
+def write_csv_predictions(csv_path, out_path, model, scaler, feature_columns, class_labels,
+                          window_size, chunksize=DEFAULT_CSV_CHUNKSIZE, progress=None):
+    """
+    Write streamed predictions to out_path (.csv or .parquet) chunk by chunk.
+    Returns the number of predicted windows
+    """
+    results = iter_csv_predictions(csv_path, model, scaler, feature_columns, class_labels,
+                                   window_size, chunksize=chunksize, progress=progress)
+    written = 0
+    if os.path.splitext(out_path)[1].lower() == '.parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for frame in results:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(out_path, table.schema)
+                writer.write_table(table)
+                written += len(frame)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(out_path, 'w', newline='') as f:
+            for frame in results:
+                frame.to_csv(f, header=(written == 0), index=False)
+                written += len(frame)
+    return written
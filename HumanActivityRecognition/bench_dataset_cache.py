@@ -0,0 +1,84 @@
+#bench_dataset_cache.py
+"""
+Load time and peak RSS of the wide HAR CSV path (read_csv, to_numeric per column,
+fillna with the column means; float64) against the float32 dataset cache: the one-off
+build and a warm memory-mapped load. Each path runs in its own process so peak RSS
+is not shared between them.
+
+    python bench_dataset_cache.py --rows 20000 --features 561
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+
+def write_csv(path, rows, features, classes=6):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.standard_normal((rows, features)), columns=[f"f{i}" for i in range(features)])
+    df['subject'] = rng.integers(1, 30, rows)
+    df['Activity'] = np.array([f"ACTIVITY_{i}" for i in range(classes)])[rng.integers(0, classes, rows)]
+    df.to_csv(path, index=False)
+
+
+def measure(mode, csv_path, cache_dir):
+    """Runs in a child process: load the data the given way, touch every value, report"""
+    # Imported up front in both modes so the timings and RSS share the same baseline
+    from dataset_cache import load_dataset, fill_missing
+    start = time.perf_counter()
+    if mode == 'csv':
+        df = pd.read_csv(csv_path)
+        feature_columns = [col for col in df.columns if col not in ['Activity', 'subject']]
+        X = df[feature_columns].apply(pd.to_numeric, errors='coerce')
+        X = X.fillna(X.mean())
+        y = df['Activity']
+        total = float(X.to_numpy().sum())
+    else:
+        dataset = load_dataset(csv_path, cache_dir)
+        X = dataset['X']
+        if dataset['missing_values']:
+            X = fill_missing(X, dataset['column_means'])
+        y = dataset['y']
+        total = float(X.sum(dtype=np.float64))
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    print(json.dumps({'seconds': seconds, 'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                      'rows': len(y), 'checksum': total}))
+
+
+def run(mode, csv_path, cache_dir):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', mode, csv_path, cache_dir],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV parsing against the float32 dataset cache")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--features', type=int, default=561)
+    parser.add_argument('--measure', nargs=3, metavar=('MODE', 'CSV', 'CACHE_DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'har.csv')
+        cache_dir = os.path.join(tmp, 'cache')
+        write_csv(csv_path, args.rows, args.features)
+        print(f"{args.rows} rows x {args.features} features, CSV {os.path.getsize(csv_path) / 1e6:.0f} MB")
+        for name, mode in [('CSV (float64)', 'csv'), ('cache build (first run)', 'cache'),
+                           ('cache load (memmap)', 'cache')]:
+            result = run(mode, csv_path, cache_dir)
+            print(f"{name:<26} {result['seconds']:7.2f}s   peak RSS {result['peak_rss_mb']:7.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#bench_input_pipeline.py
+"""
+Training-input throughput (samples/sec): the in-memory train_hybrid_model path
+(read_csv, fit_transform, to_categorical, train_test_split, fit at batch 32) against
+the streaming tf.data pipeline at a configurable batch size. A small dense model is
+used so the numbers reflect the input path rather than the CNN-LSTM.
+
+    python bench_input_pipeline.py --rows 50000 --features 561 --shards 4 --batch-size 256 --format parquet
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+
+def write_shards(out_dir, rows, features, shards, fmt='csv', classes=6):
+    rng = np.random.default_rng(0)
+    labels = np.array([f"ACTIVITY_{i}" for i in range(classes)])
+    paths = []
+    for shard in range(shards):
+        n = rows // shards
+        df = pd.DataFrame(rng.standard_normal((n, features)).astype(np.float32),
+                          columns=[f"f{i}" for i in range(features)])
+        df['subject'] = shard
+        df['Activity'] = labels[rng.integers(0, classes, n)]
+        path = os.path.join(out_dir, f"shard_{shard}.{fmt}")
+        if fmt == 'parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def read_shard(path):
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+
+
+def small_model(input_shape, num_classes):
+    # Cheap model so the measurement is dominated by the input path
+    import tensorflow as tf
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=input_shape),
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(64, activation='relu'),
+        tf.keras.layers.Dense(num_classes, activation='softmax'),
+    ])
+    model.compile(optimizer='adam', loss='categorical_crossentropy')
+    return model
+
+
+def timed_fit(model, epochs, *args, **kwargs):
+    start = time.perf_counter()
+    model.fit(*args, epochs=epochs, verbose=0, **kwargs)
+    return time.perf_counter() - start
+
+
+def bench_in_memory(paths, batch_size, epochs):
+    """Returns (training samples, prep seconds, fit seconds)"""
+    from sklearn.preprocessing import StandardScaler, LabelEncoder
+    from sklearn.model_selection import train_test_split
+    from tensorflow.keras.utils import to_categorical
+
+    start = time.perf_counter()
+    df = pd.concat([read_shard(p) for p in paths], ignore_index=True).drop(columns=['subject'])
+    X = df.drop(columns=['Activity'])
+    y_encoded = LabelEncoder().fit_transform(df['Activity'])
+    y_categorical = to_categorical(y_encoded)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_reshaped = X_scaled.reshape((X_scaled.shape[0], 1, X_scaled.shape[1]))
+    X_train, _, y_train, _ = train_test_split(X_reshaped, y_categorical, test_size=0.2,
+                                              random_state=42, stratify=y_encoded)
+    prep = time.perf_counter() - start
+    model = small_model(X_reshaped.shape[1:], y_categorical.shape[1])
+    fit = timed_fit(model, epochs, X_train, y_train, batch_size=batch_size)
+    return len(X_train), prep, fit
+
+
+def bench_streaming(paths, batch_size, shuffle_buffer, epochs):
+    """Returns (training samples, prep seconds, fit seconds)"""
+    from input_pipeline import feature_columns_for, compute_stats, make_dataset
+
+    start = time.perf_counter()
+    feature_columns = feature_columns_for(paths[0])
+    scaler, classes = compute_stats(paths, feature_columns)
+    prep = time.perf_counter() - start
+    dataset = make_dataset(paths, feature_columns, scaler, classes, batch_size=batch_size,
+                           shuffle_buffer=shuffle_buffer)
+    model = small_model((1, len(feature_columns)), len(classes))
+    fit = timed_fit(model, epochs, dataset)
+
+    # Count the training samples (the validation split is hash-based)
+    samples = sum(int(X.shape[0]) for X, _ in make_dataset(paths, feature_columns, scaler, classes,
+                                                           batch_size=4096, shuffle_buffer=0, one_hot=False))
+    return samples, prep, fit
+
+
+def report(name, samples, prep, fit, epochs):
+    print(f"{name:<28} prep {prep:6.1f}s   fit {samples * epochs / fit:10.0f} samples/s   "
+          f"end-to-end {samples * epochs / (prep + fit):10.0f} samples/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark training input throughput")
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--features', type=int, default=561)
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--shuffle-buffer', type=int, default=10000)
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_shards(tmp, args.rows, args.features, args.shards, args.format)
+        print(f"{args.rows} rows x {args.features} features in {args.shards} {args.format} shards, "
+              f"{args.epochs} epochs")
+
+        report('in-memory (batch 32)', *bench_in_memory(paths, 32, args.epochs), args.epochs)
+        report(f'in-memory (batch {args.batch_size})', *bench_in_memory(paths, args.batch_size, args.epochs), args.epochs)
+        report(f'tf.data (batch {args.batch_size})',
+               *bench_streaming(paths, args.batch_size, args.shuffle_buffer, args.epochs), args.epochs)
+
+
+if __name__ == "__main__":
+    main()
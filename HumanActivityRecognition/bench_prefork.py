@@ -0,0 +1,168 @@
+#bench_prefork.py
+"""
+Requests/sec and per-worker memory of serve_prefork.py at several worker counts.
+RSS counts shared pages in every process; PSS splits them between the processes
+sharing them, so the PSS total is the real footprint.
+
+    python bench_prefork.py --workers 1 2 4 8                 # demo models (NumPy runtime)
+    python bench_prefork.py --model-root . --workers 1 2 4 8  # serve ./models
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_demo_models(model_dir, features=561, classes=6, seed=0):
+    """create_hybrid_model-sized weights (kernel-1 convolutions) for the NumPy runtime, no TensorFlow"""
+    import joblib
+    from sklearn.preprocessing import StandardScaler, LabelEncoder
+    from numpy_runtime import NumpyModel
+    from model_export import NUMPY_FILE
+    rng = np.random.default_rng(seed)
+    os.makedirs(model_dir, exist_ok=True)
+
+    def w(*shape):
+        return (rng.standard_normal(shape) / np.sqrt(shape[-2] if len(shape) > 1 else 1)).astype(np.float32)
+
+    conv = {'strides': [1], 'padding': 'valid', 'dilation_rate': [1], 'activation': 'relu'}
+    layers = [
+        ('Conv1D', conv, [w(1, features, 64), np.zeros(64, np.float32)]),
+        ('Conv1D', conv, [w(1, 64, 128), np.zeros(128, np.float32)]),
+        ('Conv1D', conv, [w(1, 128, 64), np.zeros(64, np.float32)]),
+        ('LSTM', {'return_sequences': True}, [w(64, 400), w(100, 400), np.zeros(400, np.float32)]),
+        ('LSTM', {'return_sequences': False}, [w(100, 200), w(50, 200), np.zeros(200, np.float32)]),
+        ('Dense', {'activation': 'relu'}, [w(50, 50), np.zeros(50, np.float32)]),
+        ('Dense', {'activation': 'softmax'}, [w(50, classes), np.zeros(classes, np.float32)]),
+    ]
+    NumpyModel(layers).save(os.path.join(model_dir, NUMPY_FILE))
+    joblib.dump(StandardScaler().fit(rng.standard_normal((1000, features))), os.path.join(model_dir, 'scaler.pkl'))
+    joblib.dump(LabelEncoder().fit([f"ACTIVITY_{i}" for i in range(classes)]),
+                os.path.join(model_dir, 'label_encoder.pkl'))
+    with open(os.path.join(model_dir, 'feature_columns.json'), 'w') as f:
+        json.dump([f"f{i}" for i in range(features)], f)
+
+
+def memory_kb(pid):
+    """(Rss, Pss) in KiB from /proc/<pid>/smaps_rollup"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0][:-1]] = int(parts[1])
+    return values['Rss'], values['Pss']
+
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def _client(url, payload, duration, results):
+    session = requests.Session()
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = session.post(url, data=payload, headers={'Content-Type': 'application/json'})
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+    results.put(latencies)
+
+
+def wait_ready(base_url, workers, timeout=120):
+    """Until readiness has answered 200 several times in a row (the socket spreads calls over workers)"""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while time.monotonic() < deadline and streak < 4 * workers:
+        try:
+            ok = requests.get(f"{base_url}/api/health/ready", timeout=5).status_code == 200
+        except requests.ConnectionError:
+            ok = False
+        streak = streak + 1 if ok else 0
+        time.sleep(0.05 if ok else 0.5)
+    if streak < 4 * workers:
+        raise RuntimeError("Server did not become ready")
+
+
+def run(workers, args, model_root, payload):
+    env = dict(os.environ, HAR_SAMPLE_POOL_HIGH_WATER='0', PYTHONPATH=HERE)
+    command = [sys.executable, os.path.join(HERE, 'serve_prefork.py'), '--workers', str(workers),
+               '--host', '127.0.0.1', '--port', str(args.port)]
+    if args.no_preload:
+        command.append('--no-preload')
+    server = subprocess.Popen(command, cwd=model_root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(base_url, workers)
+        ctx = mp.get_context('fork')
+        results = ctx.Queue()
+        clients = [ctx.Process(target=_client, args=(f"{base_url}/api/predict-activities", payload,
+                                                     args.duration, results))
+                   for _ in range(args.clients)]
+        for client in clients:
+            client.start()
+        latencies = np.concatenate([results.get() for _ in clients])
+        for client in clients:
+            client.join()
+
+        worker_memory = [memory_kb(pid) for pid in child_pids(server.pid)]
+        master_rss, master_pss = memory_kb(server.pid)
+        return {
+            'workers': workers,
+            'rps': len(latencies) / args.duration,
+            'p50_ms': 1000 * float(np.median(latencies)) if len(latencies) else None,
+            'master_rss_mb': master_rss / 1024,
+            'worker_rss_mb': np.mean([rss for rss, _ in worker_memory]) / 1024,
+            'worker_pss_mb': np.mean([pss for _, pss in worker_memory]) / 1024,
+            'total_pss_mb': (master_pss + sum(pss for _, pss in worker_memory)) / 1024,
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pre-fork HAR server at several worker counts")
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4, 8])
+    parser.add_argument('--model-root', help="Directory containing models/ (default: generated demo models)")
+    parser.add_argument('--samples', type=int, default=10, help="Readings per request")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--port', type=int, default=5077)
+    parser.add_argument('--no-preload', action='store_true', help="Workers load everything themselves")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_root = args.model_root
+        if model_root is None:
+            model_root = tmp
+            make_demo_models(os.path.join(tmp, 'models'))
+        with open(os.path.join(model_root, 'models', 'feature_columns.json')) as f:
+            feature_columns = json.load(f)
+        rng = np.random.default_rng(0)
+        payload = json.dumps({'sensor_data': [dict(zip(feature_columns, map(float, row)))
+                                              for row in rng.standard_normal((args.samples, len(feature_columns)))]})
+
+        print(f"{os.cpu_count()} CPU(s), {args.clients} client processes, {args.samples} readings/request, "
+              f"{'no preload' if args.no_preload else 'preloaded + shared memory'}")
+        print(f"{'workers':>7} {'req/s':>8} {'p50 ms':>8} {'master RSS':>11} {'worker RSS':>11} "
+              f"{'worker PSS':>11} {'total PSS':>10}")
+        for workers in args.workers:
+            r = run(workers, args, model_root, payload)
+            print(f"{r['workers']:>7} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} {r['master_rss_mb']:>9.0f}MB "
+                  f"{r['worker_rss_mb']:>9.0f}MB {r['worker_pss_mb']:>9.0f}MB {r['total_pss_mb']:>8.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#bench_reduction.py
+"""
+Sweep the post-scaler reduction (feature_reduction.py) over k: test accuracy, latency and
+model size of the HAR_Prediction CNN+LSTM trained on k features, against all 561.
+
+    python bench_reduction.py --train-csv train_har.csv --test-csv test.csv --k 16 32 64 128
+    python bench_reduction.py --rows 8000            # synthetic low-rank data
+"""
+import argparse
+import io
+import os
+import time
+import numpy as np
+from sklearn.preprocessing import StandardScaler, LabelEncoder
+from windowing import create_sequences
+from feature_reduction import fit_reducer, Preprocessor
+from numpy_runtime import NumpyModel
+
+WINDOW_SIZE = 5
+
+
+def synthetic_data(rows, features=561, latent=24, classes=6, seed=0):
+    """Class-dependent low-rank signals plus noise, like the correlated HAR feature set"""
+    rng = np.random.default_rng(seed)
+    y = np.repeat(rng.integers(0, classes, rows // 50 + 1), 50)[:rows]  # activities last a while
+    centers = rng.standard_normal((classes, latent))
+    z = centers[y] + 1.5 * rng.standard_normal((rows, latent))
+    X = z @ rng.standard_normal((latent, features)) + 0.5 * rng.standard_normal((rows, features))
+    split = int(rows * 0.75)
+    labels = np.array([f"ACTIVITY_{i}" for i in range(classes)])[y]
+    return X[:split], labels[:split], X[split:], labels[split:]
+
+
+def csv_data(train_csv, test_csv):
+    from dataset_cache import load_dataset, fill_missing
+    train, test = load_dataset(train_csv), load_dataset(test_csv)
+    return (fill_missing(train['X'], train['column_means']), train['y'],
+            fill_missing(test['X'], train['column_means']), test['y'])
+
+
+def build_model(num_features, num_classes):
+    """Same layers and defaults as HAR_Prediction.build_model"""
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Input, Conv1D, MaxPooling1D, LSTM, Dense, Dropout
+    model = Sequential([
+        Input((WINDOW_SIZE, num_features)),
+        Conv1D(filters=64, kernel_size=3, activation='relu'),
+        MaxPooling1D(pool_size=2),
+        Dropout(0.4),
+        LSTM(64, return_sequences=False),
+        Dense(64, activation='relu'),
+        Dropout(0.4),
+        Dense(num_classes, activation='softmax')
+    ])
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def run(method, k, X_train, y_train, X_test, y_test, epochs, repeat=200):
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    reducer = fit_reducer(X_train_scaled, y_train, method, k)
+    preprocessor = Preprocessor(scaler, reducer)
+    if reducer is not None:
+        X_train_scaled = reducer.transform(X_train_scaled)
+    X_test_scaled = preprocessor.transform_array(X_test)
+
+    train_seq, train_labels = create_sequences(X_train_scaled, y_train, WINDOW_SIZE)
+    test_seq, test_labels = create_sequences(X_test_scaled, y_test, WINDOW_SIZE)
+    model = build_model(X_train_scaled.shape[1], int(y_train.max()) + 1)
+    start = time.perf_counter()
+    model.fit(train_seq, train_labels, epochs=epochs, batch_size=64, verbose=0)
+    fit_seconds = time.perf_counter() - start
+    accuracy = float(np.mean(model.predict(test_seq, verbose=0).argmax(axis=1) == test_labels))
+
+    # Serving cost on the TensorFlow-free NumPy runtime: preprocessing + forward pass
+    # for one request window, and per window in a 256-window batch
+    numpy_model = NumpyModel.from_keras(model)
+    raw_window = X_test[:WINDOW_SIZE].astype(np.float32)
+    raw_batch = X_test[:256 + WINDOW_SIZE - 1].astype(np.float32)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        numpy_model.predict(preprocessor.transform_array(raw_window)[None])
+    single_ms = 1000 * (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    for _ in range(repeat // 10):
+        batch = create_sequences(preprocessor.transform_array(raw_batch), np.zeros(len(raw_batch)), WINDOW_SIZE)[0]
+        numpy_model.predict(np.ascontiguousarray(batch))
+    batch_us = 1e6 * (time.perf_counter() - start) / (repeat // 10) / 256
+
+    buffer = io.BytesIO()
+    np.savez(buffer, *model.get_weights())
+    return {
+        'method': method,
+        'k': X_train_scaled.shape[1],
+        'accuracy': accuracy,
+        'single_ms': single_ms,
+        'batch_us_per_window': batch_us,
+        'params': model.count_params(),
+        'size_kb': buffer.tell() / 1024,
+        'fit_seconds': fit_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy / latency / size sweep over the reduction width k")
+    parser.add_argument('--train-csv')
+    parser.add_argument('--test-csv')
+    parser.add_argument('--rows', type=int, default=8000, help="Synthetic rows when no CSVs are given")
+    parser.add_argument('--methods', nargs='+', default=['pca', 'anova'])
+    parser.add_argument('--k', nargs='+', type=int, default=[16, 32, 64, 128])
+    parser.add_argument('--epochs', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.train_csv and args.test_csv:
+        X_train, labels_train, X_test, labels_test = csv_data(args.train_csv, args.test_csv)
+    else:
+        X_train, labels_train, X_test, labels_test = synthetic_data(args.rows)
+    le = LabelEncoder().fit(labels_train)
+    y_train, y_test = le.transform(labels_train), le.transform(labels_test)
+    print(f"{len(X_train)} train / {len(X_test)} test rows x {X_train.shape[1]} features, window {WINDOW_SIZE}")
+
+    configs = [('none', X_train.shape[1])] + [(method, k) for method in args.methods for k in args.k]
+    print(f"{'reduction':<10} {'k':>4} {'accuracy':>9} {'1 window ms':>12} {'us/window@256':>14} "
+          f"{'params':>8} {'size KB':>8} {'fit s':>7}")
+    for method, k in configs:
+        r = run(method, k, X_train, y_train, X_test, y_test, args.epochs)
+        print(f"{r['method']:<10} {r['k']:>4} {r['accuracy']:>9.4f} {r['single_ms']:>12.3f} "
+              f"{r['batch_us_per_window']:>14.1f} {r['params']:>8,} {r['size_kb']:>8.0f} {r['fit_seconds']:>7.1f}")
+
+
+if __name__ == "__main__":
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    main()
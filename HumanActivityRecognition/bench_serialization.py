@@ -0,0 +1,70 @@
+#bench_serialization.py
+"""
+Benchmark /api/generate-data serialization: the original per-row/per-column loop
+against the vectorized serialize_samples paths.
+
+    python bench_serialization.py --samples 2000 --features 561
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from serialization import serialize_samples, RESPONSE_FORMATS
+
+
+def serialize_loop(synthetic_data, feature_columns):
+    """The original generate-data loop, kept here as the baseline"""
+    sensor_data = []
+    for i in range(len(synthetic_data)):
+        timestamp = datetime.now() + timedelta(milliseconds=i*100)
+        sample = {
+            'timestamp': timestamp.isoformat(),
+            'sample_id': i + 1
+        }
+        for col in feature_columns:
+            if col in synthetic_data.columns:
+                value = synthetic_data.iloc[i][col]
+                if 'acc' in col.lower():
+                    sample[col.lower()] = float(value)
+                elif 'gyro' in col.lower():
+                    sample[col.lower()] = float(value)
+                else:
+                    sample[col] = float(value)
+        sensor_data.append(sample)
+    return sensor_data
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate-data serialization")
+    parser.add_argument('--samples', type=int, default=2000)
+    parser.add_argument('--features', type=int, default=561)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    feature_columns = [f"tBodyAcc-{i}" if i % 3 == 0 else f"fBodyGyro-{i}" if i % 3 == 1 else f"angle-{i}"
+                       for i in range(args.features)]
+    synthetic_data = pd.DataFrame(np.random.randn(args.samples, args.features), columns=feature_columns)
+    print(f"{args.samples} samples x {args.features} features")
+
+    loop_time, loop_result = best_of(lambda: serialize_loop(synthetic_data, feature_columns), 1)
+    print(f"{'loop (original)':<20} {loop_time * 1000:10.1f} ms  {len(json.dumps(loop_result)) / 1e6:8.2f} MB JSON")
+
+    for fmt in RESPONSE_FORMATS:
+        fmt_time, result = best_of(lambda: serialize_samples(synthetic_data, feature_columns, fmt), args.repeat)
+        size = len(json.dumps(result)) / 1e6
+        print(f"{fmt:<20} {fmt_time * 1000:10.1f} ms  {size:8.2f} MB JSON  ({loop_time / fmt_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#bench_startup.py
+"""
+HAR_Prediction.py startup with and without the artifact store, on synthetic HAR-shaped
+CSVs: cold (no artifacts: fit the encoder, scaler and CNN+LSTM, then save a version)
+against warm (load_artifacts). Each start runs in a fresh process, so both pay the
+TensorFlow import like the real script does.
+
+    python bench_startup.py --train-rows 7352 --test-rows 2947 --features 561
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_dataset_cache import write_csv
+
+# HAR_Prediction.py's settings; they key the artifact store together with the CSV hashes
+WINDOW_SIZE = 5
+HYPERPARAMS = {
+    'window_size': WINDOW_SIZE,
+    'epochs': 10,
+    'batch_size': 64,
+    'conv_filters': 64,
+    'lstm_units': 64,
+    'dense_units': 64,
+    'dropout': 0.4,
+    'reduction': 'none',
+    'n_components': None,
+}
+
+
+def build_model(num_features, num_classes):
+    """Same layers as HAR_Prediction.build_model (that module starts the Gradio app on import)"""
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Input, Conv1D, MaxPooling1D, LSTM, Dense, Dropout
+    model = Sequential([
+        Input(shape=(WINDOW_SIZE, num_features)),
+        Conv1D(filters=HYPERPARAMS['conv_filters'], kernel_size=3, activation='relu'),
+        MaxPooling1D(pool_size=2),
+        Dropout(HYPERPARAMS['dropout']),
+        LSTM(HYPERPARAMS['lstm_units'], return_sequences=False),
+        Dense(HYPERPARAMS['dense_units'], activation='relu'),
+        Dropout(HYPERPARAMS['dropout']),
+        Dense(num_classes, activation='softmax')
+    ])
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def start(train_path, test_path, artifact_dir, cache_dir):
+    """Runs in a child process: HAR_Prediction.py's startup up to a ready model"""
+    started = time.perf_counter()
+    import numpy as np
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler, LabelEncoder
+    from artifact_store import artifact_key, load_artifacts, save_artifacts
+    from dataset_cache import load_dataset, select_columns, fill_missing, as_frame
+    from feature_reduction import Preprocessor
+    from windowing import create_sequences
+
+    train_data = load_dataset(train_path, cache_dir)
+    test_data = load_dataset(test_path, cache_dir)
+    feature_columns = train_data['feature_columns']
+    key = artifact_key([train_path, test_path], HYPERPARAMS)
+    artifacts = load_artifacts(artifact_dir, key)
+    if artifacts is None:
+        le = LabelEncoder()
+        y_train_enc = le.fit_transform(train_data['y'])
+        y_test_enc = le.transform(test_data['y'])
+        fill_means = pd.Series(train_data['column_means'].astype(np.float64), index=feature_columns)
+        X_train = fill_missing(train_data['X'], train_data['column_means'])
+        X_test = fill_missing(select_columns(test_data, feature_columns), train_data['column_means'])
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(as_frame(X_train, feature_columns))
+        preprocessor = Preprocessor(scaler, None)
+        X_test_scaled = preprocessor.transform(as_frame(X_test, feature_columns))
+        X_train_seq, y_train_seq = create_sequences(X_train_scaled, y_train_enc, WINDOW_SIZE)
+        X_test_seq, y_test_seq = create_sequences(X_test_scaled, y_test_enc, WINDOW_SIZE)
+        model = build_model(X_train_scaled.shape[1], len(le.classes_))
+        model.fit(X_train_seq, y_train_seq, epochs=HYPERPARAMS['epochs'], batch_size=HYPERPARAMS['batch_size'],
+                  validation_data=(X_test_seq, y_test_seq), verbose=0)
+        save_artifacts(artifact_dir, key, model, preprocessor, le, feature_columns, fill_means,
+                       hyperparams=HYPERPARAMS)
+    print(json.dumps({'hit': artifacts is not None, 'seconds': time.perf_counter() - started}))
+
+
+def run(args, tmp):
+    command = [sys.executable, os.path.abspath(__file__), '--child', os.path.join(tmp, 'train.csv'),
+               os.path.join(tmp, 'test.csv'), os.path.join(tmp, 'artifacts'), os.path.join(tmp, 'dataset_cache')]
+    out = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HAR_Prediction.py startup with and without cached artifacts")
+    parser.add_argument('--train-rows', type=int, default=7352)
+    parser.add_argument('--test-rows', type=int, default=2947)
+    parser.add_argument('--features', type=int, default=561)
+    parser.add_argument('--epochs', type=int, default=HYPERPARAMS['epochs'])
+    parser.add_argument('--warm-runs', type=int, default=3)
+    parser.add_argument('--child', nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    HYPERPARAMS['epochs'] = args.epochs
+    if args.child:
+        start(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_csv(os.path.join(tmp, 'train.csv'), args.train_rows, args.features)
+        write_csv(os.path.join(tmp, 'test.csv'), args.test_rows, args.features)
+        print(f"{args.train_rows} train / {args.test_rows} test rows, {args.features} features, "
+              f"{HYPERPARAMS['epochs']} epochs, {os.cpu_count()} CPU(s)")
+        cold = run(args, tmp)
+        assert not cold['hit']
+        warm = [run(args, tmp) for _ in range(args.warm_runs)]
+        assert all(r['hit'] for r in warm)
+        warm_s = min(r['seconds'] for r in warm)
+        print(f"cold start (train + save)   {cold['seconds']:8.2f}s")
+        print(f"warm start (load artifacts) {warm_s:8.2f}s   ({cold['seconds'] / warm_s:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
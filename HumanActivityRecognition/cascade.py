@@ -0,0 +1,229 @@
+#cascade.py
+"""
+Confidence-gated cascade: a linear model over the scaled features classifies every
+window and only the windows it is unsure about go on to the CNN-LSTM.
+
+    python cascade.py --model-dir models --csv HAR_test.csv    # fit, calibrate, save, report
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import joblib
+import numpy as np
+
+FIRST_STAGE_FILE = 'first_stage.pkl'
+CASCADE_FILE = 'cascade.json'
+
+# Accuracy the cascade may give up against the CNN-LSTM alone on the calibration split
+MAX_ACCURACY_DROP = 0.005
+
+
+def first_stage_features(inputs):
+    """Model inputs (n, timesteps, features) or (n, features) -> the row each window is labelled by"""
+    inputs = np.asarray(inputs, dtype=np.float32)
+    return inputs[:, -1, :] if inputs.ndim == 3 else inputs
+
+
+def fit_first_stage(inputs, y_encoded, C=1.0, max_iter=1000):
+    """Multinomial logistic regression; predicting is one matrix product and a softmax"""
+    from sklearn.linear_model import LogisticRegression
+    first_stage = LogisticRegression(C=C, max_iter=max_iter)
+    first_stage.fit(first_stage_features(inputs), y_encoded)
+    return first_stage
+
+
+def first_stage_proba(first_stage, inputs, num_classes):
+    """(n, num_classes) probabilities, columns in label-encoder order"""
+    probs = np.zeros((len(inputs), num_classes), dtype=np.float32)
+    probs[:, first_stage.classes_] = first_stage.predict_proba(first_stage_features(inputs))
+    return probs
+
+
+def calibrate_threshold(first_probs, second_probs, y, max_accuracy_drop=MAX_ACCURACY_DROP):
+    """
+    Lowest first-stage confidence threshold whose cascade accuracy on (first_probs,
+    second_probs, y) stays within max_accuracy_drop of the second stage alone.
+    Every cut point is scored at once: with windows sorted by first-stage confidence, the
+    top k are answered by the first stage and the rest by the second
+    """
+    y = np.asarray(y)
+    confidence = first_probs.max(axis=1)
+    order = np.argsort(-confidence, kind='stable')
+    confidence = confidence[order]
+    first_correct = (first_probs.argmax(axis=1) == y)[order]
+    second_correct = (second_probs.argmax(axis=1) == y)[order]
+
+    n = len(y)
+    # correct[k] = cascade hits when the k most confident windows stop at the first stage
+    cum_first = np.concatenate([[0], np.cumsum(first_correct)])
+    cum_second = np.concatenate([[0], np.cumsum(second_correct)])
+    correct = cum_first + (cum_second[-1] - cum_second)
+    target = cum_second[-1] - max_accuracy_drop * n
+
+    # Only cut between distinct confidences, since the gate is confidence >= threshold
+    cuts = np.flatnonzero(np.concatenate([confidence[:-1] > confidence[1:], [True]])) + 1
+    ok = cuts[correct[cuts] >= target]
+    if not len(ok):
+        return 1.01  # Nothing is safe to stop early; every window goes to the second stage
+    return float(confidence[ok.max() - 1])
+
+
+class ModelCascade:
+    """
+    Keras-style predict() over two stages. Windows whose first-stage confidence reaches
+    `threshold` keep the first-stage probabilities; the rest are sent, in one call, to
+    `second_stage` (any callable mapping inputs to probabilities, e.g. model.predict or
+    InferenceScheduler.predict)
+    """
+
+    def __init__(self, first_stage, second_stage, threshold, num_classes):
+        self.first_stage = first_stage
+        self.second_stage = second_stage
+        self.threshold = threshold
+        self.num_classes = num_classes
+
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.second_stage_rows = 0
+        self.first_stage_seconds = 0.0
+        self.second_stage_seconds = 0.0
+
+    def predict(self, inputs, batch_size=None, verbose=0):
+        inputs = np.asarray(inputs, dtype=np.float32)
+        start = time.perf_counter()
+        probs = first_stage_proba(self.first_stage, inputs, self.num_classes)
+        hard = np.flatnonzero(probs.max(axis=1) < self.threshold)
+        first_done = time.perf_counter()
+        if len(hard):
+            probs[hard] = self.second_stage(inputs[hard])
+        with self._lock:
+            self.rows += len(inputs)
+            self.second_stage_rows += len(hard)
+            self.first_stage_seconds += first_done - start
+            self.second_stage_seconds += time.perf_counter() - first_done
+        return probs
+
+    def stats(self):
+        with self._lock:
+            return {
+                'threshold': self.threshold,
+                'rows': self.rows,
+                'first_stage_fraction': 1 - self.second_stage_rows / self.rows if self.rows else None,
+                'second_stage_fraction': self.second_stage_rows / self.rows if self.rows else None,
+                'first_stage_ms_per_row': 1000 * self.first_stage_seconds / self.rows if self.rows else None,
+                'second_stage_ms_per_row': (1000 * self.second_stage_seconds / self.second_stage_rows
+                                            if self.second_stage_rows else None),
+            }
+
+
+def evaluate_cascade(cascade, full_predict, inputs, y):
+    """Accuracy, stage fractions and throughput of the cascade against the second stage alone"""
+    y = np.asarray(y)
+    start = time.perf_counter()
+    full_probs = full_predict(inputs)
+    full_seconds = time.perf_counter() - start
+
+    rows_before, second_before = cascade.rows, cascade.second_stage_rows
+    start = time.perf_counter()
+    cascade_probs = cascade.predict(inputs)
+    cascade_seconds = time.perf_counter() - start
+    second_rows = cascade.second_stage_rows - second_before
+    rows = cascade.rows - rows_before
+
+    return {
+        'rows': rows,
+        'threshold': cascade.threshold,
+        'first_stage_fraction': 1 - second_rows / rows if rows else None,
+        'second_stage_fraction': second_rows / rows if rows else None,
+        'accuracy_full': float(np.mean(full_probs.argmax(axis=1) == y)),
+        'accuracy_cascade': float(np.mean(cascade_probs.argmax(axis=1) == y)),
+        'agreement': float(np.mean(full_probs.argmax(axis=1) == cascade_probs.argmax(axis=1))),
+        'rows_per_sec_full': rows / full_seconds if full_seconds else None,
+        'rows_per_sec_cascade': rows / cascade_seconds if cascade_seconds else None,
+    }
+
+
+def save_cascade(save_dir, first_stage, threshold=None, report=None):
+    """
+    Write first_stage.pkl and cascade.json, or remove stale ones when first_stage is None,
+    so a model saved without a cascade is never served behind an old first stage
+    """
+    paths = [os.path.join(save_dir, name) for name in (FIRST_STAGE_FILE, CASCADE_FILE)]
+    if first_stage is None:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        return
+    joblib.dump(first_stage, paths[0])
+    with open(paths[1], 'w') as f:
+        json.dump({'threshold': threshold, 'calibration': report}, f, indent=2)
+
+
+def load_cascade(model_dir, second_stage, num_classes):
+    """The saved cascade around second_stage, or None when no first stage was exported"""
+    first_stage_path = os.path.join(model_dir, FIRST_STAGE_FILE)
+    if not os.path.exists(first_stage_path):
+        return None
+    with open(os.path.join(model_dir, CASCADE_FILE)) as f:
+        config = json.load(f)
+    return ModelCascade(joblib.load(first_stage_path), second_stage, config['threshold'], num_classes)
+
+
+def print_report(report):
+    print(f"threshold {report['threshold']:.4f}: {100 * report['first_stage_fraction']:.1f}% first stage, "
+          f"{100 * report['second_stage_fraction']:.1f}% CNN-LSTM")
+    print(f"accuracy  CNN-LSTM {report['accuracy_full']:.4f}   cascade {report['accuracy_cascade']:.4f}   "
+          f"agreement {report['agreement']:.4f}")
+    print(f"rows/sec  CNN-LSTM {report['rows_per_sec_full']:,.0f}   cascade {report['rows_per_sec_cascade']:,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit and calibrate the first-stage classifier for a trained hybrid model")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--csv', default='HAR_test.csv')
+    parser.add_argument('--validation-split', type=float, default=0.2)
+    parser.add_argument('--max-accuracy-drop', type=float, default=MAX_ACCURACY_DROP)
+    parser.add_argument('--runtime', default='auto', help="Hybrid model runtime (see model_export.py)")
+    args = parser.parse_args()
+
+    from sklearn.model_selection import train_test_split
+    from dataset_cache import load_dataset, fill_missing
+    from model_export import load_inference_model
+    from feature_reduction import load_preprocessor
+
+    preprocessor = load_preprocessor(args.model_dir)
+    label_encoder = joblib.load(os.path.join(args.model_dir, 'label_encoder.pkl'))
+    with open(os.path.join(args.model_dir, 'feature_columns.json')) as f:
+        feature_columns = json.load(f)
+    model = load_inference_model(args.model_dir, runtime=args.runtime)
+
+    dataset = load_dataset(args.csv)
+    columns = [dataset['feature_columns'].index(col) for col in feature_columns]
+    X = fill_missing(dataset['X'], dataset['column_means'])[:, columns]
+    X = preprocessor.transform_array(X).reshape(len(X), 1, -1)
+    y = label_encoder.transform(dataset['y'])
+
+    # Same split as HARSystem.train_hybrid_model, so neither half of the validation rows
+    # (one calibrates the threshold, the other is reported on) was trained on
+    X_train, X_val, y_train, y_val = train_test_split(
+        X, y, test_size=args.validation_split, random_state=42, stratify=y)
+    X_cal, X_eval, y_cal, y_eval = train_test_split(X_val, y_val, test_size=0.5, random_state=42, stratify=y_val)
+
+    def full_predict(inputs):
+        return model.predict(inputs, batch_size=len(inputs), verbose=0)
+
+    first_stage = fit_first_stage(X_train, y_train)
+    num_classes = len(label_encoder.classes_)
+    threshold = calibrate_threshold(first_stage_proba(first_stage, X_cal, num_classes), full_predict(X_cal),
+                                    y_cal, args.max_accuracy_drop)
+    report = evaluate_cascade(ModelCascade(first_stage, full_predict, threshold, num_classes),
+                              full_predict, X_eval, y_eval)
+    save_cascade(args.model_dir, first_stage, threshold, report)
+    print_report(report)
+    print(f"Saved {FIRST_STAGE_FILE} and {CASCADE_FILE} to {args.model_dir}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#dataset_cache.py
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from artifact_store import file_sha256
+from input_pipeline import TARGET_COLUMN, DROP_COLUMNS
+
+# Bump when the cached layout or the CSV conversion changes
+DATASET_FORMAT_VERSION = 1
+DATASET_CACHE_DIR = os.environ.get('HAR_DATASET_CACHE_DIR', 'dataset_cache')
+SOURCES_FILE = 'sources.json'
+
+# Rows parsed per CSV chunk while building a cache entry
+BUILD_CHUNKSIZE = 20000
+
+
+def _source_sha256(csv_path, cache_dir):
+    """
+    sha256 of the CSV, remembered per (path, size, mtime) in the cache's sources.json so an
+    unchanged file is not re-hashed on every load
+    """
+    index_path = os.path.join(cache_dir, SOURCES_FILE)
+    sources = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            sources = json.load(f)
+    stat = os.stat(csv_path)
+    abs_path = os.path.abspath(csv_path)
+    entry = sources.get(abs_path)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+
+    sha = file_sha256(csv_path)
+    sources[abs_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha}
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(sources, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return sha
+
+
+def dataset_key(csv_path, cache_dir=DATASET_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    return f"{_source_sha256(csv_path, cache_dir)[:16]}-v{DATASET_FORMAT_VERSION}"
+
+
+def _build(csv_path, entry_dir):
+    """Parse the CSV once, in chunks: float32 features (NaN where not numeric) and labels"""
+    header = list(pd.read_csv(csv_path, nrows=0).columns)
+    feature_columns = [col for col in header if col != TARGET_COLUMN and col not in DROP_COLUMNS]
+    usecols = feature_columns + ([TARGET_COLUMN] if TARGET_COLUMN in header else [])
+
+    feature_blocks, label_blocks = [], []
+    for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=BUILD_CHUNKSIZE):
+        features = chunk[feature_columns]
+        # Only columns that did not parse as numbers pay for to_numeric
+        text_columns = [col for col in feature_columns if not pd.api.types.is_numeric_dtype(features[col])]
+        if text_columns:
+            features = features.copy()
+            features[text_columns] = features[text_columns].apply(pd.to_numeric, errors='coerce')
+        feature_blocks.append(features.to_numpy(dtype=np.float32))
+        if TARGET_COLUMN in chunk:
+            label_blocks.append(chunk[TARGET_COLUMN].astype(str).to_numpy())
+
+    X = np.concatenate(feature_blocks) if feature_blocks else np.empty((0, len(feature_columns)), np.float32)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(entry_dir))
+    try:
+        np.save(os.path.join(tmp_dir, 'features.npy'), X)
+        if label_blocks:
+            np.save(os.path.join(tmp_dir, 'labels.npy'), np.concatenate(label_blocks).astype(str))
+        meta = {
+            'format_version': DATASET_FORMAT_VERSION,
+            'source': os.path.abspath(csv_path),
+            'rows': int(X.shape[0]),
+            'feature_columns': feature_columns,
+            'has_labels': bool(label_blocks),
+            # Means over the numeric values only, as DataFrame.mean() skips NaN
+            'column_means': np.nanmean(X, axis=0, dtype=np.float64).tolist() if len(X) else [],
+            'missing_values': int(np.isnan(X).sum()),
+        }
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        if os.path.exists(entry_dir):
+            shutil.rmtree(tmp_dir)  # Another process built it first
+        else:
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # Lost the race to a process that built the same key after the check
+                if not os.path.exists(os.path.join(entry_dir, 'meta.json')):
+                    raise
+                shutil.rmtree(tmp_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def load_dataset(csv_path, cache_dir=DATASET_CACHE_DIR, mmap=True):
+    """
+    The HAR CSV as float32 arrays, converted once and cached under its content hash.
+    Returns a dict with X (rows x features float32, memory-mapped read-only), y (str
+    labels or None), feature_columns, column_means and missing_values. Values that were
+    not numeric in the CSV are NaN; see fill_missing
+    """
+    key = dataset_key(csv_path, cache_dir)
+    entry_dir = os.path.join(cache_dir, key)
+    if not os.path.exists(os.path.join(entry_dir, 'meta.json')):
+        print(f"Building float32 dataset cache for {csv_path}...")
+        _build(csv_path, entry_dir)
+    with open(os.path.join(entry_dir, 'meta.json')) as f:
+        meta = json.load(f)
+    labels_path = os.path.join(entry_dir, 'labels.npy')
+    return {
+        'key': key,
+        'X': np.load(os.path.join(entry_dir, 'features.npy'), mmap_mode='r' if mmap else None),
+        'y': np.load(labels_path) if meta['has_labels'] else None,
+        'feature_columns': meta['feature_columns'],
+        'column_means': np.asarray(meta['column_means'], dtype=np.float32),
+        'missing_values': meta['missing_values'],
+    }
+
+
+def select_columns(data, feature_columns):
+    """
+    data['X'] with its columns in feature_columns order, so a CSV whose columns are ordered
+    differently (or has extra ones) lines up with the training layout
+    """
+    columns = data['feature_columns']
+    if list(columns) == list(feature_columns):
+        return data['X']
+    missing = [col for col in feature_columns if col not in columns]
+    if missing:
+        raise ValueError(f"Dataset is missing {len(missing)} feature column(s), e.g. {missing[:5]}")
+    position = {col: i for i, col in enumerate(columns)}
+    return np.take(data['X'], [position[col] for col in feature_columns], axis=1)
+
+
+def fill_missing(X, fill_values):
+    """X with NaN replaced by the per-column fill_values (X itself when nothing is missing)"""
+    mask = np.isnan(X)
+    if not mask.any():
+        return X
+    X = np.array(X, dtype=np.float32)
+    X[mask] = np.broadcast_to(np.asarray(fill_values, dtype=np.float32), X.shape)[mask]
+    return X
+
+
+def as_frame(X, feature_columns):
+    """DataFrame view of a cached matrix for pandas/sklearn consumers that want column names"""
+    return pd.DataFrame(X, columns=feature_columns, copy=False)
@@ -0,0 +1,94 @@
+#feature_reduction.py
+import os
+import joblib
+import numpy as np
+
+REDUCER_FILE = 'reducer.pkl'
+
+# none keeps every standardized feature; pca projects onto the top principal components;
+# anova keeps the k features with the highest ANOVA F-score against the activity label
+REDUCTIONS = ('none', 'pca', 'anova')
+
+
+def fit_reducer(X_scaled, y=None, method='pca', n_components=64):
+    """Fit a reduction on standardized features; returns None for method 'none'"""
+    if method not in REDUCTIONS:
+        raise ValueError(f"Unknown reduction '{method}', expected one of {', '.join(REDUCTIONS)}")
+    if method == 'none':
+        return None
+    if method == 'pca':
+        from sklearn.decomposition import PCA
+        return PCA(n_components=n_components, svd_solver='randomized', random_state=42).fit(X_scaled)
+    if y is None:
+        raise ValueError("anova reduction needs labels")
+    from sklearn.feature_selection import SelectKBest, f_classif
+    return SelectKBest(f_classif, k=n_components).fit(X_scaled, y)
+
+
+class Preprocessor:
+    """
+    StandardScaler followed by an optional fitted reducer; a drop-in for the scaler
+    wherever features are transformed. transform() goes through sklearn as in training;
+    transform_array() is the serving fast path, with scaling and reduction folded into
+    one float32 column selection or matrix product
+    """
+
+    def __init__(self, scaler, reducer=None):
+        self.scaler = scaler
+        self.reducer = reducer
+
+        mean = scaler.mean_.astype(np.float64)
+        scale = scaler.scale_.astype(np.float64)
+        self.columns = None  # Input columns read by transform_array (None = all)
+        self.weights = None  # (features, components) projection, for PCA
+        if reducer is None:
+            self.offset = mean.astype(np.float32)
+            self.divisor = scale.astype(np.float32)
+        elif hasattr(reducer, 'components_'):
+            # ((X - mean) / scale - pca_mean) @ C.T == X @ (C / scale).T - (mean / scale + pca_mean) @ C.T
+            components = reducer.components_.astype(np.float64)
+            self.weights = (components / scale).T.astype(np.float32)
+            self.bias = (-(mean / scale + reducer.mean_) @ components.T).astype(np.float32)
+        else:
+            self.columns = reducer.get_support(indices=True)
+            self.offset = mean[self.columns].astype(np.float32)
+            self.divisor = scale[self.columns].astype(np.float32)
+
+    @property
+    def n_features_in(self):
+        return len(self.scaler.mean_)
+
+    @property
+    def n_features_out(self):
+        if self.weights is not None:
+            return self.weights.shape[1]
+        return len(self.columns) if self.columns is not None else self.n_features_in
+
+    def transform(self, X):
+        X_scaled = self.scaler.transform(X)
+        return X_scaled if self.reducer is None else self.reducer.transform(X_scaled)
+
+    def transform_array(self, X):
+        """Raw (rows, n_features_in) readings -> float32 (rows, n_features_out) model features"""
+        X = np.asarray(X, dtype=np.float32)
+        if self.weights is not None:
+            return X @ self.weights + self.bias
+        if self.columns is not None:
+            X = X[:, self.columns]
+        return (X - self.offset) / self.divisor
+
+
+def save_reducer(save_dir, reducer):
+    """Write reducer.pkl, or remove a stale one when the model was trained without reduction"""
+    path = os.path.join(save_dir, REDUCER_FILE)
+    if reducer is not None:
+        joblib.dump(reducer, path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def load_preprocessor(model_dir):
+    """scaler.pkl plus reducer.pkl when the model was trained on reduced features"""
+    scaler = joblib.load(os.path.join(model_dir, 'scaler.pkl'))
+    reducer_path = os.path.join(model_dir, REDUCER_FILE)
+    return Preprocessor(scaler, joblib.load(reducer_path) if os.path.exists(reducer_path) else None)
@@ -0,0 +1,26 @@
+#gunicorn.conf.py
+# gunicorn -c gunicorn.conf.py app:app
+# Same pre-fork model sharing as serve_prefork.py, with gunicorn managing the workers
+import os
+from serve_prefork import preload_models, init_worker, release_shared_memory, threads_per_worker
+
+bind = os.environ.get('HAR_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('HAR_WORKERS', '4'))
+worker_class = 'gthread'
+threads = int(os.environ.get('HAR_WORKER_THREADS', '8'))
+# Import app.py in the master so the preloaded models are inherited by every worker
+preload_app = True
+
+
+def when_ready(server):
+    import app
+    preload_models(app)
+
+
+def post_fork(server, worker):
+    import app
+    init_worker(app, threads_per_worker(workers), workers)
+
+
+def on_exit(server):
+    release_shared_memory()
@@ -0,0 +1,141 @@
+#inference_scheduler.py
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+
+class _Request:
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+
+class InferenceScheduler:
+    """
+    Micro-batching front end for a Keras model.
+    Callers submit input windows from any thread; a single worker collects queued
+    requests and runs one model.predict per batch, flushing when `max_batch_size`
+    windows are queued or the oldest request has waited `max_wait_ms`. Each caller
+    gets back only its own rows
+    """
+
+    def __init__(self, model, max_batch_size=256, max_wait_ms=5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = []
+        self._queued_rows = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Stats
+        self.requests = 0
+        self.batches = 0
+        self.batched_rows = 0
+        self.batched_requests = 0
+        self.max_queue_depth = 0
+        self.flush_on_size = 0
+        self.flush_on_timeout = 0
+        self.predict_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+        self._thread.start()
+
+    def submit(self, inputs):
+        """Queue inputs (n, ...) for prediction; returns a Future of the (n, classes) output"""
+        request = _Request(np.asarray(inputs, dtype=np.float32))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Inference scheduler is closed")
+            self._queue.append(request)
+            self._queued_rows += len(request.inputs)
+            self.requests += 1
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+            self._cond.notify()
+        return request.future
+
+    def predict(self, inputs, timeout=None):
+        """Blocking drop-in for model.predict(inputs)"""
+        return self.submit(inputs).result(timeout=timeout)
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+
+            # Wait for more work until the batch is full or the oldest request times out;
+            # requests that queued during the previous predict may already be past it
+            deadline = self._queue[0].enqueued + self.max_wait
+            while self._queued_rows < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if self._queued_rows >= self.max_batch_size:
+                self.flush_on_size += 1
+            else:
+                self.flush_on_timeout += 1
+
+            # Take whole requests up to max_batch_size rows (always at least one)
+            batch, rows = [], 0
+            while self._queue and (not batch or rows + len(self._queue[0].inputs) <= self.max_batch_size):
+                request = self._queue.pop(0)
+                batch.append(request)
+                rows += len(request.inputs)
+            self._queued_rows -= rows
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                inputs = np.concatenate([request.inputs for request in batch])
+                start = time.perf_counter()
+                outputs = self.model.predict(inputs, batch_size=len(inputs), verbose=0)
+                elapsed = time.perf_counter() - start
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            with self._cond:
+                self.batches += 1
+                self.batched_rows += len(inputs)
+                self.batched_requests += len(batch)
+                self.predict_seconds += elapsed
+            offset = 0
+            for request in batch:
+                n = len(request.inputs)
+                request.future.set_result(outputs[offset:offset + n])
+                offset += n
+
+    def stats(self):
+        with self._cond:
+            return {
+                'queue_depth': len(self._queue),
+                'queued_rows': self._queued_rows,
+                'max_queue_depth': self.max_queue_depth,
+                'requests': self.requests,
+                'batches': self.batches,
+                'avg_batch_rows': self.batched_rows / self.batches if self.batches else None,
+                'avg_batch_fill': self.batched_rows / (self.batches * self.max_batch_size) if self.batches else None,
+                'avg_requests_per_batch': self.batched_requests / self.batches if self.batches else None,
+                'flush_on_size': self.flush_on_size,
+                'flush_on_timeout': self.flush_on_timeout,
+                'avg_predict_ms': 1000 * self.predict_seconds / self.batches if self.batches else None,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+            }
+
+    def close(self):
+        """Stop accepting work; queued requests are still served"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
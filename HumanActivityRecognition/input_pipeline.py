@@ -0,0 +1,149 @@
+#input_pipeline.py
+import os
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+TARGET_COLUMN = 'Activity'
+DROP_COLUMNS = ['subject']
+
+# Rows read per shard chunk
+DEFAULT_CHUNKSIZE = 10000
+
+
+def shard_columns(path):
+    """Column names of a CSV or Parquet shard, read without loading the data"""
+    if os.path.splitext(path)[1].lower() == '.parquet':
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(path).names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def feature_columns_for(path):
+    return [col for col in shard_columns(path) if col != TARGET_COLUMN and col not in DROP_COLUMNS]
+
+
+def iter_shard_chunks(path, feature_columns, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield (features float32, labels) blocks of one CSV or Parquet shard"""
+    columns = list(feature_columns) + [TARGET_COLUMN]
+    if os.path.splitext(path)[1].lower() == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            df = batch.to_pandas()
+            yield df[feature_columns].to_numpy(dtype=np.float32), df[TARGET_COLUMN].to_numpy()
+    else:
+        for df in pd.read_csv(path, chunksize=chunksize, usecols=columns):
+            yield df[feature_columns].to_numpy(dtype=np.float32), df[TARGET_COLUMN].to_numpy()
+
+
+def compute_stats(paths, feature_columns, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    One streaming pass over the shards: per-feature mean/variance and the label set.
+    Returns a fitted StandardScaler (so it saves and serves like the in-memory one) and
+    the sorted class labels
+    """
+    count = 0
+    mean = np.zeros(len(feature_columns), dtype=np.float64)
+    m2 = np.zeros(len(feature_columns), dtype=np.float64)
+    labels = set()
+    for path in paths:
+        for X, y in iter_shard_chunks(path, feature_columns, chunksize):
+            if not len(X):
+                continue
+            # Merge per-chunk moments (Chan et al.) to stay stable over many rows
+            X = X.astype(np.float64)
+            n_b = len(X)
+            mean_b = X.mean(axis=0)
+            m2_b = np.square(X - mean_b).sum(axis=0)
+            delta = mean_b - mean
+            total = count + n_b
+            mean = mean + delta * n_b / total
+            m2 = m2 + m2_b + np.square(delta) * count * n_b / total
+            count = total
+            labels.update(np.unique(y).tolist())
+    if count == 0:
+        raise ValueError("No rows found in the training shards")
+
+    var = m2 / count
+    scaler = StandardScaler()
+    scaler.mean_ = mean
+    scaler.var_ = var
+    scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+    scaler.n_samples_seen_ = count
+    scaler.n_features_in_ = len(feature_columns)
+    scaler.feature_names_in_ = np.asarray(feature_columns, dtype=object)
+    return scaler, np.array(sorted(labels), dtype=object)
+
+
+def _validation_mask(row_ids, validation_split):
+    # Deterministic per-row split (Knuth multiplicative hash), stable across epochs
+    return ((row_ids * 2654435761) % (1 << 32)) / float(1 << 32) < validation_split
+
+
+def _window_generator(paths, feature_columns, classes, window_size, validation_split, subset, chunksize):
+    """
+    Raw (unscaled) blocks of windows' rows for one subset.
+    Each block carries the previous chunk's last window_size-1 rows of the same shard,
+    so windows are built lazily without ever materializing a whole shard
+    """
+    def generator():
+        for path in paths:
+            carry_X = np.empty((0, len(feature_columns)), dtype=np.float32)
+            carry_y = np.empty((0,), dtype=np.int64)
+            row_offset = 0
+            for X, y in iter_shard_chunks(path, feature_columns, chunksize):
+                y = np.searchsorted(classes, y).astype(np.int64)
+                block_X = np.concatenate([carry_X, X])
+                block_y = np.concatenate([carry_y, y])
+                block_start = row_offset - len(carry_X)
+                row_offset += len(X)
+                if len(block_X) >= window_size:
+                    # Window i ends at row block_start + i + window_size - 1
+                    end_rows = np.arange(block_start + window_size - 1, block_start + len(block_X))
+                    is_val = _validation_mask(end_rows, validation_split)
+                    keep = is_val if subset == 'validation' else ~is_val
+                    yield block_X, block_y, keep
+                carry_X = block_X[max(len(block_X) - (window_size - 1), 0):]
+                carry_y = block_y[max(len(block_y) - (window_size - 1), 0):]
+    return generator
+
+
+def make_dataset(paths, feature_columns, scaler, classes, window_size=1, batch_size=256,
+                 shuffle_buffer=10000, validation_split=0.2, subset='training',
+                 chunksize=DEFAULT_CHUNKSIZE, one_hot=True, seed=42):
+    """
+    tf.data pipeline streaming (window, label) batches from CSV/Parquet shards.
+    Scaling uses the precomputed scaler statistics and runs in a parallel map; windows
+    are framed per chunk; training batches come from a bounded shuffle buffer; every
+    stage is prefetched
+    """
+    import tensorflow as tf
+    AUTOTUNE = tf.data.AUTOTUNE
+    num_features = len(feature_columns)
+    num_classes = len(classes)
+    mean = tf.constant(scaler.mean_, dtype=tf.float32)
+    scale = tf.constant(scaler.scale_, dtype=tf.float32)
+
+    dataset = tf.data.Dataset.from_generator(
+        _window_generator(paths, feature_columns, classes, window_size, validation_split, subset, chunksize),
+        output_signature=(
+            tf.TensorSpec(shape=(None, num_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.int64),
+            tf.TensorSpec(shape=(None,), dtype=tf.bool),
+        ),
+    )
+
+    def scale_and_frame(X, y, keep):
+        X = (X - mean) / scale
+        windows = tf.signal.frame(X, window_size, 1, axis=0)
+        labels = y[window_size - 1:]
+        return tf.boolean_mask(windows, keep), tf.boolean_mask(labels, keep)
+
+    dataset = dataset.map(scale_and_frame, num_parallel_calls=AUTOTUNE).prefetch(AUTOTUNE)
+    dataset = dataset.unbatch()
+    if subset == 'training' and shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    if one_hot:
+        dataset = dataset.map(lambda X, y: (X, tf.one_hot(y, num_classes)), num_parallel_calls=AUTOTUNE)
+    return dataset.prefetch(AUTOTUNE)
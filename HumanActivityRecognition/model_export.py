@@ -0,0 +1,191 @@
+#model_export.py
+"""
+Export the trained hybrid model to lightweight CPU runtimes and pick one at serve time.
+
+    python model_export.py --model-dir models            # export + parity check
+    python model_export.py --model-dir models --check    # parity check only
+"""
+import argparse
+import os
+import threading
+import numpy as np
+from numpy_runtime import NumpyModel
+
+KERAS_FILE = 'hybrid_model.h5'
+TFLITE_FILE = 'hybrid_model.tflite'
+NUMPY_FILE = 'hybrid_model_numpy.npz'
+
+RUNTIMES = ('auto', 'tflite', 'numpy', 'keras')
+
+# Fixed batch dimension of the TFLite graph (its LSTMs cannot be resized after export).
+# One invoke runs this many rows, so an InferenceScheduler batch of 256 takes 4 invokes
+# instead of 256; a smaller call is padded up to it
+TFLITE_BATCH_SIZE = 64
+
+# Largest absolute difference in class probabilities accepted by check_parity
+PARITY_ATOL = 1e-4
+
+
+def export_tflite(model, path, batch_size=TFLITE_BATCH_SIZE):
+    """Convert a Keras model to a float32 TFLite flatbuffer using builtin ops only"""
+    import tensorflow as tf
+    # LSTMs only lower to builtin TFLite ops with a static batch dimension, so the same
+    # layers are re-applied to a fixed-batch input and TFLiteModel feeds it in chunks
+    inputs = tf.keras.Input(shape=model.input_shape[1:], batch_size=batch_size)
+    outputs = inputs
+    for layer in model.layers:
+        outputs = layer(outputs)
+    converter = tf.lite.TFLiteConverter.from_keras_model(tf.keras.Model(inputs, outputs))
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+    flatbuffer = converter.convert()
+    with open(path, 'wb') as f:
+        f.write(flatbuffer)
+
+
+def export_runtimes(model, save_dir, tflite_batch_size=TFLITE_BATCH_SIZE):
+    """Write the TFLite and NumPy versions of model next to the .h5; returns the written paths"""
+    written = {}
+    NumpyModel.from_keras(model).save(os.path.join(save_dir, NUMPY_FILE))
+    written['numpy'] = os.path.join(save_dir, NUMPY_FILE)
+    try:
+        export_tflite(model, os.path.join(save_dir, TFLITE_FILE), tflite_batch_size)
+        written['tflite'] = os.path.join(save_dir, TFLITE_FILE)
+    except Exception as e:
+        print(f"TFLite export skipped: {e}")
+    return written
+
+
+def _standalone_interpreter_class():
+    """The TFLite interpreter from tflite_runtime / ai_edge_litert, or None when neither is installed"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        return None
+
+
+def _tflite_interpreter_class():
+    # Prefer the standalone runtimes so serving never has to import full TensorFlow
+    interpreter = _standalone_interpreter_class()
+    if interpreter is not None:
+        return interpreter
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class TFLiteModel:
+    """Keras-compatible predict() on top of a TFLite interpreter"""
+
+    def __init__(self, path, num_threads=None):
+        self.interpreter = _tflite_interpreter_class()(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = int(self._input['shape'][0])
+        # An interpreter must not be invoked from two threads at once
+        self._lock = threading.Lock()
+
+    def predict(self, x, batch_size=None, verbose=0):
+        x = np.asarray(x, dtype=self._input['dtype'])
+        outputs = np.empty((len(x),) + tuple(self._output['shape'][1:]), dtype=self._output['dtype'])
+        with self._lock:
+            for start in range(0, len(x), self._batch):
+                chunk = x[start:start + self._batch]
+                n = len(chunk)
+                if n < self._batch:
+                    # Pad the tail up to the graph's fixed batch size
+                    chunk = np.concatenate([chunk, np.zeros((self._batch - n,) + chunk.shape[1:], chunk.dtype)])
+                self.interpreter.set_tensor(self._input['index'], chunk)
+                self.interpreter.invoke()
+                outputs[start:start + n] = self.interpreter.get_tensor(self._output['index'])[:n]
+        return outputs
+
+
+def resolve_runtime(model_dir, runtime='auto'):
+    """
+    The runtime load_inference_model will use. 'auto' only picks TFLite when a standalone
+    interpreter is installed; otherwise the NumPy export is served so TensorFlow is never
+    imported, and TFLite through tf.lite or Keras are the last resorts
+    """
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Unknown runtime '{runtime}', expected one of {', '.join(RUNTIMES)}")
+    if runtime != 'auto':
+        return runtime
+    has_tflite = os.path.exists(os.path.join(model_dir, TFLITE_FILE))
+    if has_tflite and _standalone_interpreter_class() is not None:
+        return 'tflite'
+    if os.path.exists(os.path.join(model_dir, NUMPY_FILE)):
+        return 'numpy'
+    return 'tflite' if has_tflite else 'keras'
+
+
+def load_inference_model(model_dir, runtime='auto', num_threads=None):
+    """
+    Load the hybrid model for serving, in the runtime chosen by resolve_runtime.
+    num_threads caps the TFLite / TensorFlow thread pools (the NumPy runtime follows the
+    process's BLAS limits)
+    """
+    runtime = resolve_runtime(model_dir, runtime)
+    if runtime == 'tflite':
+        return TFLiteModel(os.path.join(model_dir, TFLITE_FILE), num_threads=num_threads)
+    if runtime == 'numpy':
+        return NumpyModel.load(os.path.join(model_dir, NUMPY_FILE))
+
+    import tensorflow as tf
+    if num_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(num_threads)
+    return tf.keras.models.load_model(os.path.join(model_dir, KERAS_FILE))
+
+
+def check_parity(reference, candidate, inputs, atol=PARITY_ATOL):
+    """Compare two models' probabilities on the same inputs"""
+    expected = reference.predict(inputs, verbose=0)
+    actual = candidate.predict(inputs, verbose=0)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(inputs) else 0.0
+    return {
+        'max_abs_diff': max_diff,
+        'argmax_agreement': float(np.mean(np.argmax(expected, 1) == np.argmax(actual, 1))) if len(inputs) else 1.0,
+        'passed': max_diff <= atol,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the hybrid model and check runtime parity")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--check', action='store_true', help="Only run the parity check on existing exports")
+    parser.add_argument('--samples', type=int, default=256, help="Random inputs used for the parity check")
+    parser.add_argument('--atol', type=float, default=PARITY_ATOL)
+    parser.add_argument('--tflite-batch-size', type=int, default=TFLITE_BATCH_SIZE,
+                        help="Fixed batch of the TFLite graph (rows per invoke)")
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    keras_model = tf.keras.models.load_model(os.path.join(args.model_dir, KERAS_FILE))
+    if not args.check:
+        for runtime, path in export_runtimes(keras_model, args.model_dir, args.tflite_batch_size).items():
+            print(f"Exported {runtime}: {path}")
+
+    inputs = np.random.default_rng(0).standard_normal(
+        (args.samples,) + tuple(keras_model.input_shape[1:])).astype(np.float32)
+    failed = False
+    for runtime in ('numpy', 'tflite'):
+        try:
+            candidate = load_inference_model(args.model_dir, runtime)
+        except Exception as e:
+            print(f"{runtime:<8} unavailable: {e}")
+            continue
+        result = check_parity(keras_model, candidate, inputs, args.atol)
+        failed |= not result['passed']
+        print(f"{runtime:<8} max |diff| = {result['max_abs_diff']:.2e}  "
+              f"argmax agreement = {result['argmax_agreement']:.4f}  {'OK' if result['passed'] else 'FAILED'}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
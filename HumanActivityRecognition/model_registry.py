@@ -0,0 +1,137 @@
+#model_registry.py
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LOADING = 'loading'
+LOADED = 'loaded'
+FAILED = 'failed'
+
+
+class _Entry:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.status = PENDING
+        self.value = None
+        self.error = None
+        self.load_time = None
+        self.failed_at = None
+        self.future = None
+
+
+class ModelRegistry:
+    """
+    Loads named artifacts on a thread pool, each independently.
+    Loader functions do their own heavy imports, so nothing is imported until an
+    artifact is actually loaded, and one slow model never blocks the others. A failed
+    load is tried again by the next load() / get() once `retry_after` seconds have passed
+    """
+
+    def __init__(self, max_workers=4, retry_after=5.0):
+        self.retry_after = retry_after
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-loader')
+
+    def register(self, name, loader):
+        self._entries[name] = _Entry(name, loader)
+
+    def _run(self, entry):
+        entry.status = LOADING
+        start = time.perf_counter()
+        try:
+            entry.value = entry.loader()
+            # load_time first, so readiness never shows a loaded model without one
+            entry.load_time = time.perf_counter() - start
+            entry.error = None
+            entry.status = LOADED
+            logger.info(f"✅ {entry.name} loaded in {entry.load_time:.2f}s")
+        except Exception as e:
+            entry.load_time = time.perf_counter() - start
+            entry.error = str(e)
+            entry.failed_at = time.monotonic()
+            entry.status = FAILED
+            logger.error(f"❌ Error loading {entry.name}: {e}")
+        return entry.value
+
+    def load(self, names=None):
+        """
+        Schedule background loading. Artifacts already scheduled are left alone, except
+        failed ones, which are submitted again once retry_after has passed (e.g. a model
+        file that was not synced yet when the process started)
+        """
+        with self._lock:
+            for name in (names if names is not None else list(self._entries)):
+                entry = self._entries[name]
+                retry = entry.status == FAILED and time.monotonic() - entry.failed_at >= self.retry_after
+                if entry.future is None or retry:
+                    if retry:
+                        entry.status = PENDING
+                    entry.future = self._executor.submit(self._run, entry)
+        return self
+
+    def get(self, name, timeout=None):
+        """
+        Return the artifact, loading it on first use.
+        Returns None if it failed to load or is not ready within `timeout` seconds
+        """
+        entry = self._entries[name]
+        if entry.status == LOADED:
+            return entry.value
+        self.load([name])
+        if timeout != 0:
+            try:
+                entry.future.exception(timeout=timeout)
+            except FutureTimeout:
+                pass
+        return entry.value if entry.status == LOADED else None
+
+    def is_loaded(self, *names):
+        names = names or list(self._entries)
+        return all(self._entries[name].status == LOADED for name in names)
+
+    def wait(self, names=None, timeout=None):
+        """Block until the given artifacts finish loading; True if all loaded"""
+        names = names if names is not None else list(self._entries)
+        self.load(names)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in names:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                self._entries[name].future.exception(timeout=remaining)
+            except FutureTimeout:
+                return False
+        return self.is_loaded(*names)
+
+    def shutdown(self):
+        """Wait for running loads and stop the loader threads (before forking workers)"""
+        self._executor.shutdown(wait=True)
+
+    def after_fork(self, max_workers=4):
+        """
+        In a forked child: start a fresh loader pool. Artifacts loaded before the fork are
+        kept; anything else loads again in this process on first use
+        """
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-loader')
+        for entry in self._entries.values():
+            if entry.status != LOADED:
+                entry.status, entry.future, entry.error, entry.load_time = PENDING, None, None, None
+                entry.failed_at = None
+
+    def status(self):
+        """Per-artifact load status and load time, for health endpoints"""
+        return {
+            name: {
+                'status': entry.status,
+                'load_time_s': None if entry.load_time is None else round(entry.load_time, 3),
+                'error': entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
@@ -0,0 +1,163 @@
+#numpy_runtime.py
+import json
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Keras layers the NumPy forward pass knows how to run
+SUPPORTED_LAYERS = ('Conv1D', 'MaxPooling1D', 'LSTM', 'Dense', 'Dropout', 'Flatten', 'InputLayer')
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def _softmax(x):
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'tanh': np.tanh,
+    'sigmoid': _sigmoid,
+    'softmax': _softmax,
+}
+
+
+def _activation(name):
+    if name not in ACTIVATIONS:
+        raise NotImplementedError(f"Activation '{name}' is not supported by the NumPy runtime")
+    return ACTIVATIONS[name]
+
+
+def _conv1d(x, config, kernel, bias):
+    """x: (batch, steps, channels); kernel: (k, channels, filters)"""
+    k = kernel.shape[0]
+    stride = config['strides'][0] if isinstance(config['strides'], (list, tuple)) else config['strides']
+    dilation = config.get('dilation_rate', 1)
+    dilation = dilation[0] if isinstance(dilation, (list, tuple)) else dilation
+    if dilation != 1:
+        raise NotImplementedError("Dilated Conv1D is not supported by the NumPy runtime")
+    if config['padding'] == 'same':
+        out_steps = -(-x.shape[1] // stride)
+        pad = max((out_steps - 1) * stride + k - x.shape[1], 0)
+        x = np.pad(x, ((0, 0), (pad // 2, pad - pad // 2), (0, 0)))
+    elif config['padding'] != 'valid':
+        raise NotImplementedError(f"Conv1D padding '{config['padding']}' is not supported")
+    # (batch, steps', channels, k) windows over the time axis
+    windows = sliding_window_view(x, k, axis=1)[:, ::stride]
+    out = np.einsum('btck,kcf->btf', windows, kernel, optimize=True)
+    if bias is not None:
+        out = out + bias
+    return _activation(config['activation'])(out)
+
+
+def _max_pool1d(x, config):
+    pool = config['pool_size'][0] if isinstance(config['pool_size'], (list, tuple)) else config['pool_size']
+    stride = config.get('strides') or pool
+    stride = stride[0] if isinstance(stride, (list, tuple)) else stride
+    if config.get('padding', 'valid') != 'valid':
+        raise NotImplementedError("Only 'valid' MaxPooling1D is supported by the NumPy runtime")
+    return sliding_window_view(x, pool, axis=1)[:, ::stride].max(axis=-1)
+
+
+def _lstm(x, config, kernel, recurrent_kernel, bias):
+    """Keras LSTM with gate order (input, forget, cell, output)"""
+    if config.get('go_backwards') or config.get('time_major'):
+        raise NotImplementedError("Reversed or time-major LSTM is not supported by the NumPy runtime")
+    units = recurrent_kernel.shape[0]
+    act = _activation(config.get('activation', 'tanh'))
+    rec_act = _activation(config.get('recurrent_activation', 'sigmoid'))
+    batch, steps, _ = x.shape
+
+    # Input projections for every step in one matmul
+    projected = x @ kernel
+    if bias is not None:
+        projected = projected + bias
+    h = np.zeros((batch, units), dtype=x.dtype)
+    c = np.zeros((batch, units), dtype=x.dtype)
+    outputs = np.empty((batch, steps, units), dtype=x.dtype) if config.get('return_sequences') else None
+    for t in range(steps):
+        z = projected[:, t] + h @ recurrent_kernel
+        i = rec_act(z[:, :units])
+        f = rec_act(z[:, units:2 * units])
+        g = act(z[:, 2 * units:3 * units])
+        o = rec_act(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * act(c)
+        if outputs is not None:
+            outputs[:, t] = h
+    return outputs if outputs is not None else h
+
+
+class NumpyModel:
+    """
+    Pure-NumPy forward pass for the Sequential Conv1D/LSTM/Dense models in this project.
+    Runs without TensorFlow; exposes a Keras-compatible predict()
+    """
+
+    def __init__(self, layers, dtype=np.float32):
+        # layers: list of (class_name, config, [weights...])
+        self.layers = layers
+        self.dtype = dtype
+
+    @classmethod
+    def from_keras(cls, model):
+        layers = []
+        for layer in model.layers:
+            name = layer.__class__.__name__
+            if name not in SUPPORTED_LAYERS:
+                raise NotImplementedError(f"Layer {name} is not supported by the NumPy runtime")
+            if name in ('Dropout', 'InputLayer'):
+                continue
+            config = {k: v for k, v in layer.get_config().items()
+                      if isinstance(v, (str, int, float, bool, list, tuple, type(None)))}
+            layers.append((name, config, [np.asarray(w) for w in layer.get_weights()]))
+        return cls(layers)
+
+    def save(self, path):
+        """Write the layer configs and weights to a single .npz file"""
+        arrays = {}
+        specs = []
+        for li, (name, config, weights) in enumerate(self.layers):
+            specs.append({'class_name': name, 'config': config, 'num_weights': len(weights)})
+            for wi, w in enumerate(weights):
+                arrays[f"w{li}_{wi}"] = w
+        np.savez(path, __layers__=np.array(json.dumps(specs)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            specs = json.loads(str(data['__layers__']))
+            layers = [
+                (spec['class_name'], spec['config'], [data[f"w{li}_{wi}"] for wi in range(spec['num_weights'])])
+                for li, spec in enumerate(specs)
+            ]
+        return cls(layers)
+
+    def _forward(self, x):
+        for name, config, weights in self.layers:
+            weights = [w.astype(self.dtype, copy=False) for w in weights]
+            use_bias = config.get('use_bias', True)
+            if name == 'Conv1D':
+                x = _conv1d(x, config, weights[0], weights[1] if use_bias else None)
+            elif name == 'MaxPooling1D':
+                x = _max_pool1d(x, config)
+            elif name == 'LSTM':
+                x = _lstm(x, config, weights[0], weights[1], weights[2] if use_bias else None)
+            elif name == 'Dense':
+                x = x @ weights[0]
+                if use_bias:
+                    x = x + weights[1]
+                x = _activation(config['activation'])(x)
+            elif name == 'Flatten':
+                x = x.reshape(len(x), -1)
+        return x
+
+    def predict(self, x, batch_size=1024, verbose=0):
+        x = np.asarray(x, dtype=self.dtype)
+        batch_size = batch_size or len(x) or 1
+        if len(x) <= batch_size:
+            return self._forward(x)
+        return np.concatenate([self._forward(x[i:i + batch_size]) for i in range(0, len(x), batch_size)])
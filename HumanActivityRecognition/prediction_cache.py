@@ -0,0 +1,60 @@
+#prediction_cache.py
+import glob
+import hashlib
+import os
+import numpy as np
+from windowing import predict_windows
+
+CACHE_PREFIX = "test_probs_"
+
+
+def array_fingerprint(*arrays):
+    """sha256 over the shape, dtype and raw bytes of each array"""
+    h = hashlib.sha256()
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        h.update(str((arr.shape, arr.dtype.str)).encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def model_fingerprint(model):
+    """Fingerprint of a Keras model's current weights; changes whenever the weights do"""
+    return array_fingerprint(*model.get_weights())
+
+
+def load_or_build_predictions(model, X, window_size, cache_dir):
+    """
+    Return the (n_windows, n_classes) probabilities for every window of X.
+    The array is computed with one chunked forward pass, saved as .npy and memory-mapped
+    on later runs. The file name is keyed by the model weights and X, so retrained weights
+    or different data build a fresh cache and stale files are removed
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    key = hashlib.sha256(
+        f"{model_fingerprint(model)}:{array_fingerprint(X)}:{window_size}".encode()
+    ).hexdigest()[:16]
+    path = os.path.join(cache_dir, f"{CACHE_PREFIX}{key}.npy")
+
+    if os.path.exists(path):
+        print(f"Loading cached test-set predictions from {path}")
+        return np.load(path, mmap_mode='r')
+
+    print("Building test-set predictions cache...")
+    _, probs = predict_windows(model, X, window_size)
+    # Per-process temp name outside the *.npy glob below, so concurrent builders never
+    # delete each other's half-written files
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, probs)
+    os.replace(tmp_path, path)
+
+    # Drop caches that belonged to older weights or data
+    for stale in glob.glob(os.path.join(cache_dir, f"{CACHE_PREFIX}*.npy")):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass  # Another process removed it first
+
+    return np.load(path, mmap_mode='r')
@@ -0,0 +1,131 @@
+#sample_pool.py
+import logging
+import threading
+import time
+from collections import deque
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class SamplePool:
+    """
+    Bounded reservoir of pre-sampled GAN rows.
+    A background thread tops the pool up to `high_water` rows in large `refill_batch`
+    calls whenever it drops to `low_water` or below; requests are served by slicing rows off
+    the front. Rows are handed out once. Requests larger than the pool, or arriving
+    while it is short, fall back to sampling directly; sampler calls never overlap
+    """
+
+    def __init__(self, sampler, low_water=500, high_water=2000, refill_batch=1000):
+        if not 0 <= low_water < high_water:
+            raise ValueError("Expected 0 <= low_water < high_water")
+        self.sampler = sampler
+        self.low_water = low_water
+        self.high_water = high_water
+        self.refill_batch = refill_batch
+
+        self._blocks = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        # CTGAN / torch sampling is not documented as thread-safe: the refill thread and
+        # requests falling back to direct sampling take turns
+        self._sampler_lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.rows_served = 0
+        self.refills = 0
+        self.refill_rows = 0
+        self.refill_seconds = 0.0
+        self.last_refill_seconds = None
+        self.refill_errors = 0
+
+        self._thread = threading.Thread(target=self._refill_loop, name='sample-pool-refill', daemon=True)
+        self._thread.start()
+
+    def _refill_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and self._size > self.low_water:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                needed = self.high_water - self._size
+
+            while needed > 0 and not self._closed:
+                batch = min(self.refill_batch, needed)
+                start = time.perf_counter()
+                try:
+                    block = self._sample(batch)
+                except Exception as e:
+                    self.refill_errors += 1
+                    logger.error(f"❌ Sample pool refill failed: {e}")
+                    time.sleep(1.0)
+                    break
+                elapsed = time.perf_counter() - start
+                with self._cond:
+                    self._blocks.append(block)
+                    self._size += len(block)
+                    self.refills += 1
+                    self.refill_rows += len(block)
+                    self.refill_seconds += elapsed
+                    self.last_refill_seconds = elapsed
+                    needed = self.high_water - self._size
+
+    def sample(self, num_samples):
+        """Return num_samples rows, from the pool when possible"""
+        with self._cond:
+            if num_samples <= self._size:
+                parts = []
+                remaining = num_samples
+                while remaining > 0:
+                    block = self._blocks[0]
+                    if len(block) <= remaining:
+                        parts.append(self._blocks.popleft())
+                        remaining -= len(block)
+                    else:
+                        parts.append(block.iloc[:remaining])
+                        self._blocks[0] = block.iloc[remaining:]
+                        remaining = 0
+                self._size -= num_samples
+                self.hits += 1
+                self.rows_served += num_samples
+                if self._size <= self.low_water:
+                    self._cond.notify()
+                return pd.concat(parts, ignore_index=True)
+
+            self.misses += 1
+            self._cond.notify()
+
+        # Too large for the pool, or the pool is still refilling
+        return self._sample(num_samples)
+
+    def _sample(self, num_samples):
+        with self._sampler_lock:
+            return self.sampler(num_samples).reset_index(drop=True)
+
+    def metrics(self):
+        with self._cond:
+            requests = self.hits + self.misses
+            return {
+                'size': self._size,
+                'low_water': self.low_water,
+                'high_water': self.high_water,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else None,
+                'rows_served': self.rows_served,
+                'refills': self.refills,
+                'refill_errors': self.refill_errors,
+                'avg_refill_latency_s': self.refill_seconds / self.refills if self.refills else None,
+                'last_refill_latency_s': self.last_refill_seconds,
+                'avg_refill_rows_per_s': self.refill_rows / self.refill_seconds if self.refill_seconds else None,
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
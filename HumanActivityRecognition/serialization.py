@@ -0,0 +1,70 @@
+#serialization.py
+import base64
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Response layouts accepted by /api/generate-data via the "format" field
+RESPONSE_FORMATS = ('records', 'columns', 'binary')
+
+SAMPLE_INTERVAL_MS = 100  # 10Hz
+
+
+def feature_keys(feature_columns, available_columns):
+    """
+    Columns to serialize and the JSON key used for each.
+    Accelerometer and gyroscope columns are lower-cased, as the mobile client expects
+    """
+    available = set(available_columns)
+    columns, keys = [], []
+    for col in feature_columns:
+        if col in available:
+            columns.append(col)
+            lower = col.lower()
+            keys.append(lower if ('acc' in lower or 'gyro' in lower) else col)
+    return columns, keys
+
+
+def device_timestamps(num_samples, start=None, interval_ms=SAMPLE_INTERVAL_MS):
+    """ISO timestamps for num_samples readings, built as one vectorized range"""
+    start = start or datetime.now()
+    stamps = pd.date_range(start=start, periods=num_samples, freq=f'{interval_ms}ms')
+    return list(stamps.strftime('%Y-%m-%dT%H:%M:%S.%f'))
+
+
+def serialize_samples(synthetic_data, feature_columns, fmt='records', start=None):
+    """
+    Serialize sampled sensor rows for the JSON response.
+      records: list of {timestamp, sample_id, <feature>: value} dicts (original layout)
+      columns: column-major arrays, one list per feature
+      binary:  base64 little-endian float32 matrix with its shape and column keys
+    """
+    if fmt not in RESPONSE_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(RESPONSE_FORMATS)}")
+
+    columns, keys = feature_keys(feature_columns, synthetic_data.columns)
+    num_samples = len(synthetic_data)
+    timestamps = device_timestamps(num_samples, start)
+    sample_ids = list(range(1, num_samples + 1))
+    values = synthetic_data[columns].to_numpy(dtype=np.float64)
+
+    if fmt == 'records':
+        return [
+            {'timestamp': ts, 'sample_id': sid, **dict(zip(keys, row))}
+            for ts, sid, row in zip(timestamps, sample_ids, values.tolist())
+        ]
+    if fmt == 'columns':
+        return {
+            'timestamp': timestamps,
+            'sample_id': sample_ids,
+            'features': dict(zip(keys, values.T.tolist())),
+        }
+    block = np.ascontiguousarray(values, dtype='<f4')
+    return {
+        'timestamp': timestamps,
+        'sample_id': sample_ids,
+        'columns': keys,
+        'dtype': 'float32',
+        'shape': list(block.shape),
+        'data': base64.b64encode(block.tobytes()).decode('ascii'),
+    }
@@ -0,0 +1,163 @@
+#serve_prefork.py
+"""
+Production serving for the HAR API: the models are loaded once in a pre-fork master,
+their read-only arrays (scaler statistics, reducer projection, NumPy-runtime weights) are
+moved into shared memory, and N workers forked from it all accept on one listening
+socket. Each worker gets cpus / N threads for BLAS, TFLite and TensorFlow.
+
+    python serve_prefork.py --workers 4 --port 5000
+    gunicorn -c gunicorn.conf.py app:app          # same hooks under gunicorn
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+
+logger = logging.getLogger(__name__)
+
+# Plain-data artifacts, safe to load before forking (no threads, no TensorFlow state).
+# The hybrid model joins them when it is served by the NumPy runtime; a TFLite or Keras
+# model is loaded by each worker (TFLite memory-maps the model file, so its pages are
+# shared through the page cache anyway)
+PRELOAD_MODELS = ['preprocessor', 'label_encoder', 'feature_columns']
+
+# Env vars read by OpenMP / BLAS / TensorFlow when a worker first initializes them
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                   'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS')
+
+# Shared-memory blocks owned by the master, unlinked when it exits
+_shared_blocks = []
+
+
+def threads_per_worker(workers):
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def _numpy_runtime(app_module):
+    """True when the hybrid model will be served by the NumPy runtime (just arrays)"""
+    from model_export import resolve_runtime
+    return resolve_runtime(app_module.MODEL_DIR, app_module.INFERENCE_RUNTIME) == 'numpy'
+
+
+def preload_models(app_module):
+    """
+    Master: load the fork-safe artifacts, move their arrays into shared memory and stop
+    the loader threads, so that nothing but the main thread exists at fork time
+    """
+    from shared_arrays import share_preprocessor, share_numpy_model
+    models = app_module.models
+    names = PRELOAD_MODELS + (['hybrid_model'] if _numpy_runtime(app_module) else [])
+    if not models.wait(names):
+        failed = {name: status['error'] for name, status in models.status().items()
+                  if name in names and status['status'] != 'loaded'}
+        raise RuntimeError(f"Preloading failed: {failed}")
+
+    _shared_blocks.append(share_preprocessor(models.get('preprocessor')))
+    if 'hybrid_model' in names:
+        _shared_blocks.append(share_numpy_model(models.get('hybrid_model')))
+    models.shutdown()
+
+    # Objects created so far are never collected, so the GC does not write to (and
+    # un-share) the pages holding them in the workers
+    gc.collect()
+    gc.freeze()
+    shared_bytes = sum(block.nbytes for block in _shared_blocks)
+    logger.info(f"✅ Preloaded {', '.join(names)} ({shared_bytes / 1e6:.1f} MB in shared memory)")
+    return names
+
+
+def release_shared_memory():
+    while _shared_blocks:
+        _shared_blocks.pop().close(unlink=True)
+
+
+def init_worker(app_module, threads, workers=1):
+    """Forked worker: thread budget, a fresh loader pool, then load the per-worker models"""
+    os.environ.update({name: str(threads) for name in THREAD_ENV_VARS})
+    # Stream sessions are per process; with several workers app.py refuses the stream routes
+    app_module.SERVING_WORKERS = workers
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(threads)  # BLAS / OpenMP pools already loaded in the master
+    app_module.INFERENCE_THREADS = threads
+    app_module.models.after_fork(max_workers=8)
+    app_module.load_models()
+
+
+def _run_worker(app_module, sock, host, port, threads, workers):
+    from werkzeug.serving import make_server
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C goes to the master, which stops us
+    init_worker(app_module, threads, workers)
+    server = make_server(host, port, app_module.app, threaded=True, fd=sock.fileno())
+    logger.info(f"🚀 Worker {os.getpid()} serving with {threads} thread(s) per model runtime")
+    server.serve_forever()
+
+
+def serve(host='0.0.0.0', port=5000, workers=4, threads=None, preload=True):
+    import app as app_module
+    threads = threads or threads_per_worker(workers)
+    if preload:
+        preload_models(app_module)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app_module, sock, host, port, threads, workers)
+            finally:
+                os._exit(0)
+        children[pid] = True
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for _ in range(workers):
+        spawn()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info(f"🚀 Master {os.getpid()} listening on {host}:{port} with {workers} worker(s)")
+
+    try:
+        while children:
+            pid, status = os.wait()
+            children.pop(pid, None)
+            if not stopping:
+                logger.error(f"❌ Worker {pid} exited ({os.waitstatus_to_exitcode(status)}), restarting")
+                spawn()
+    finally:
+        sock.close()
+        release_shared_memory()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork multi-worker HAR API server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, help="Threads per worker (default: cpus / workers)")
+    parser.add_argument('--no-preload', action='store_true',
+                        help="Load everything in each worker instead (for memory comparisons)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    serve(args.host, args.port, args.workers, args.threads, preload=not args.no_preload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#shared_arrays.py
+from multiprocessing import shared_memory
+import numpy as np
+
+# Each array starts on a cache-line boundary inside the block
+ALIGNMENT = 64
+
+
+class SharedArrays:
+    """
+    Read-only copies of many arrays packed into one shared-memory block.
+    Created in the pre-fork master: forked workers inherit the mapping, so every worker
+    reads the same physical pages however its Python objects are touched afterwards
+    """
+
+    def __init__(self, arrays):
+        offsets, size = {}, 0
+        for name, array in arrays.items():
+            size = -(-size // ALIGNMENT) * ALIGNMENT
+            offsets[name] = size
+            size += np.asarray(array).nbytes
+        self.nbytes = size
+        self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+        self.arrays = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf, offset=offsets[name])
+            view[...] = array
+            view.flags.writeable = False
+            self.arrays[name] = view
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def close(self, unlink=False):
+        """Drop the views and unmap; the creating process also unlinks the block"""
+        self.arrays = {}
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+def share_preprocessor(preprocessor):
+    """Move a feature_reduction.Preprocessor's serving arrays into shared memory"""
+    names = [name for name in ('offset', 'divisor', 'weights', 'bias', 'columns')
+             if isinstance(getattr(preprocessor, name, None), np.ndarray)]
+    scaler_names = [name for name in ('mean_', 'scale_', 'var_')
+                    if isinstance(getattr(preprocessor.scaler, name, None), np.ndarray)]
+    shared = SharedArrays({**{name: getattr(preprocessor, name) for name in names},
+                           **{f"scaler.{name}": getattr(preprocessor.scaler, name) for name in scaler_names}})
+    for name in names:
+        setattr(preprocessor, name, shared[name])
+    for name in scaler_names:
+        setattr(preprocessor.scaler, name, shared[f"scaler.{name}"])
+    return shared
+
+
+def share_numpy_model(model):
+    """Move a numpy_runtime.NumpyModel's weights into shared memory"""
+    shared = SharedArrays({f"{li}.{wi}": weight.astype(model.dtype, copy=False)
+                           for li, (_, _, weights) in enumerate(model.layers)
+                           for wi, weight in enumerate(weights)})
+    model.layers = [(name, config, [shared[f"{li}.{wi}"] for wi in range(len(weights))])
+                    for li, (name, config, weights) in enumerate(model.layers)]
+    return shared
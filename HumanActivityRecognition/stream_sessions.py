@@ -0,0 +1,181 @@
+#stream_sessions.py
+import logging
+import threading
+import time
+import numpy as np
+from windowing import sliding_windows
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceSession:
+    """
+    Fixed-size ring buffers for one device: its last `window_size` scaled readings and
+    (for one-step models) each reading's class probabilities
+    """
+
+    def __init__(self, window_size, num_features, num_classes):
+        self.window_size = window_size
+        self.readings = np.zeros((window_size, num_features), dtype=np.float32)
+        self.probs = np.zeros((window_size, num_classes), dtype=np.float32)
+        self.count = 0                  # Readings received so far
+        self.last_prediction = None     # self.count at the last emitted prediction
+        self.last_seen = time.monotonic()
+        self.lock = threading.Lock()
+
+        # Reading arrival -> prediction latency
+        self.predictions = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.last_latency = None
+
+    def ordered(self, buffer, rows):
+        """The last `rows` entries of a ring buffer, oldest first"""
+        return buffer[(self.count - rows + np.arange(rows)) % self.window_size]
+
+    def append(self, buffer, values, start):
+        """Write values for readings start.. into a ring buffer (only the last window_size survive)"""
+        keep = min(len(values), self.window_size)
+        buffer[(start + len(values) - keep + np.arange(keep)) % self.window_size] = values[len(values) - keep:]
+
+    def metrics(self):
+        return {
+            'readings': self.count,
+            'predictions': self.predictions,
+            'avg_latency_ms': 1000 * self.latency_sum / self.predictions if self.predictions else None,
+            'max_latency_ms': 1000 * self.latency_max if self.predictions else None,
+            'last_latency_ms': 1000 * self.last_latency if self.last_latency is not None else None,
+            'idle_seconds': time.monotonic() - self.last_seen,
+        }
+
+
+class StreamSessions:
+    """
+    Per-device streaming inference.
+    Readings are appended to the device's ring buffer and a prediction is emitted once the
+    buffer first fills and then every `stride` readings. With a one-step model
+    (timesteps=1) each reading is predicted exactly once, as it arrives, and a prediction
+    is the mean of the per-reading probabilities over the window; with a sequence model
+    the window itself is the model input. Sessions idle for `idle_timeout` seconds are
+    evicted by a background thread
+    """
+
+    def __init__(self, predict, num_features, num_classes, window_size=5, stride=1, timesteps=1,
+                 idle_timeout=300.0):
+        if timesteps not in (1, window_size):
+            raise ValueError("timesteps must be 1 (per-reading model) or window_size (sequence model)")
+        if stride < 1:
+            raise ValueError("stride must be >= 1")
+        self.predict = predict
+        self.num_features = num_features
+        self.num_classes = num_classes
+        self.window_size = window_size
+        self.stride = stride
+        self.timesteps = timesteps
+        self.idle_timeout = idle_timeout
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self.evicted = 0
+
+        self._thread = threading.Thread(target=self._evict_loop, name='stream-session-evict', daemon=True)
+        self._thread.start()
+
+    def _session(self, device_id):
+        with self._lock:
+            session = self._sessions.get(device_id)
+            if session is None:
+                session = DeviceSession(self.window_size, self.num_features, self.num_classes)
+                self._sessions[device_id] = session
+            return session
+
+    def _prediction_points(self, session, start, n):
+        """Reading counts (1-based) within start+1..start+n at which a prediction is due"""
+        # The first prediction is due once the window fills, later ones every stride readings
+        first = self.window_size if session.last_prediction is None else session.last_prediction + self.stride
+        return np.arange(first, start + n + 1, self.stride)
+
+    def add_readings(self, device_id, X, arrival=None):
+        """
+        Append scaled readings (n, features) for a device. Returns one (reading count,
+        row of X that completed the window, probabilities, latency seconds) tuple per
+        prediction now due
+        """
+        arrival = time.perf_counter() if arrival is None else arrival
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self.num_features)
+        session = self._session(device_id)
+        with session.lock:
+            session.last_seen = time.monotonic()
+            start = session.count
+            points = self._prediction_points(session, start, len(X))
+
+            if self.timesteps == 1:
+                # Every reading is predicted once; windows average the stored probabilities
+                new_probs = self.predict(X.reshape(len(X), 1, self.num_features))
+                history = session.ordered(session.probs, min(start, self.window_size - 1))
+                probs = np.concatenate([history, new_probs])
+                outputs = [probs[p - start - self.window_size + len(history):p - start + len(history)].mean(axis=0)
+                           for p in points]
+            else:
+                history = session.ordered(session.readings, min(start, self.window_size - 1))
+                block = np.concatenate([history, X])
+                windows = sliding_windows(block, self.window_size)
+                # Window i of the block ends at reading start - len(history) + i + window_size
+                due = points - start + len(history) - self.window_size
+                outputs = self.predict(windows[due]) if len(due) else []
+
+            session.append(session.readings, X, start)
+            if self.timesteps == 1:
+                session.append(session.probs, new_probs, start)
+            session.count = start + len(X)
+
+            results = []
+            now = time.perf_counter()
+            for point, output in zip(points, outputs):
+                latency = now - arrival
+                session.predictions += 1
+                session.latency_sum += latency
+                session.latency_max = max(session.latency_max, latency)
+                session.last_latency = latency
+                session.last_prediction = int(point)
+                results.append((int(point), int(point) - start - 1, np.asarray(output), latency))
+            return results
+
+    def end(self, device_id):
+        with self._lock:
+            return self._sessions.pop(device_id, None) is not None
+
+    def device_metrics(self, device_id):
+        with self._lock:
+            session = self._sessions.get(device_id)
+        return session.metrics() if session is not None else None
+
+    def _evict_loop(self):
+        while not self._closed.wait(max(self.idle_timeout / 4, 1.0)):
+            cutoff = time.monotonic() - self.idle_timeout
+            with self._lock:
+                idle = [device_id for device_id, session in self._sessions.items() if session.last_seen < cutoff]
+                for device_id in idle:
+                    del self._sessions[device_id]
+                self.evicted += len(idle)
+            if idle:
+                logger.info(f"🧹 Evicted {len(idle)} idle stream session(s)")
+
+    def stats(self):
+        with self._lock:
+            sessions = dict(self._sessions)
+        predictions = sum(s.predictions for s in sessions.values())
+        return {
+            'active_sessions': len(sessions),
+            'evicted_sessions': self.evicted,
+            'predictions': predictions,
+            'avg_latency_ms': 1000 * sum(s.latency_sum for s in sessions.values()) / predictions if predictions else None,
+            'window_size': self.window_size,
+            'stride': self.stride,
+            'timesteps': self.timesteps,
+            'idle_timeout': self.idle_timeout,
+        }
+
+    def close(self):
+        self._closed.set()
@@ -0,0 +1,90 @@
+#test_model_export.py
+# python -m pytest test_model_export.py
+import sys
+import numpy as np
+import pytest
+
+from model_export import (PARITY_ATOL, NUMPY_FILE, TFLITE_FILE, TFLITE_BATCH_SIZE, export_runtimes,
+                          load_inference_model, resolve_runtime, check_parity)
+
+tf = pytest.importorskip('tensorflow')
+
+TIMESTEPS = 20
+FEATURES = 12
+NUM_CLASSES = 6
+
+
+@pytest.fixture(scope='module')
+def keras_model():
+    """Same layer stack as HARSystem.create_hybrid_model, on windows long enough for its convolutions"""
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Input, Conv1D, MaxPooling1D, LSTM, Dense, Dropout
+    tf.keras.utils.set_random_seed(0)
+    return Sequential([
+        Input(shape=(TIMESTEPS, FEATURES)),
+        Conv1D(64, 3, activation='relu'),
+        MaxPooling1D(2),
+        Conv1D(128, 3, activation='relu'),
+        MaxPooling1D(2),
+        Conv1D(64, 3, activation='relu'),
+        LSTM(100, return_sequences=True),
+        LSTM(50),
+        Dense(50, activation='relu'),
+        Dropout(0.3),
+        Dense(NUM_CLASSES, activation='softmax'),
+    ])
+
+
+@pytest.fixture(scope='module')
+def model_dir(keras_model, tmp_path_factory):
+    model_dir = tmp_path_factory.mktemp('models')
+    written = export_runtimes(keras_model, str(model_dir))
+    assert set(written) == {'numpy', 'tflite'}
+    return str(model_dir)
+
+
+@pytest.fixture(scope='module')
+def inputs():
+    # Two TFLite invokes, the second padded up to the graph's fixed batch size
+    rows = TFLITE_BATCH_SIZE + 37
+    return np.random.default_rng(0).standard_normal((rows, TIMESTEPS, FEATURES)).astype(np.float32)
+
+
+@pytest.mark.parametrize('runtime', ['numpy', 'tflite'])
+def test_runtime_matches_keras(keras_model, model_dir, inputs, runtime):
+    candidate = load_inference_model(model_dir, runtime)
+    result = check_parity(keras_model, candidate, inputs)
+    assert result['passed'], f"{runtime} max |diff| {result['max_abs_diff']:.2e} > {PARITY_ATOL}"
+    assert result['argmax_agreement'] == 1.0
+
+
+def test_tflite_invokes_whole_batches(model_dir, inputs):
+    model = load_inference_model(model_dir, 'tflite')
+    assert model._batch == TFLITE_BATCH_SIZE
+    invokes = []
+    invoke = model.interpreter.invoke
+    model.interpreter.invoke = lambda: invokes.append(1) or invoke()
+    model.predict(inputs)
+    assert len(invokes) == -(-len(inputs) // TFLITE_BATCH_SIZE)
+
+
+def test_numpy_matches_tflite(model_dir, inputs):
+    numpy_probs = load_inference_model(model_dir, 'numpy').predict(inputs)
+    tflite_probs = load_inference_model(model_dir, 'tflite').predict(inputs)
+    np.testing.assert_allclose(numpy_probs, tflite_probs, atol=PARITY_ATOL)
+
+
+def test_auto_prefers_numpy_without_standalone_tflite(model_dir, monkeypatch):
+    # Hide the standalone interpreters: 'auto' must not fall back to tf.lite (full TensorFlow)
+    monkeypatch.setitem(sys.modules, 'tflite_runtime', None)
+    monkeypatch.setitem(sys.modules, 'ai_edge_litert', None)
+    assert resolve_runtime(model_dir, 'auto') == 'numpy'
+
+
+def test_resolve_runtime_fallbacks(tmp_path):
+    assert resolve_runtime(str(tmp_path), 'auto') == 'keras'
+    (tmp_path / TFLITE_FILE).write_bytes(b'')
+    (tmp_path / NUMPY_FILE).write_bytes(b'')
+    assert resolve_runtime(str(tmp_path), 'numpy') == 'numpy'
+    with pytest.raises(ValueError):
+        resolve_runtime(str(tmp_path), 'onnx')
@@ -0,0 +1,211 @@
+#train_orchestrator.py
+"""
+Train the GAN and the hybrid classifier at the same time, each in its own process with
+its own CPU thread budget. Each job saves its artifacts as soon as it finishes, and a
+per-phase timing report (setup, data prep, fit, save) is printed and written to
+<save-dir>/training_report.json.
+
+    python train_orchestrator.py --csv HAR_test.csv --gan-threads 4 --classifier-threads 4
+    python train_orchestrator.py --csv HAR_test.csv --sequential    # one job after the other
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime
+
+JOBS = ('gan', 'classifier')
+PHASES = ('setup', 'prep', 'fit', 'save')
+REPORT_FILE = 'training_report.json'
+
+# Read by OpenMP / BLAS / TensorFlow when the child process initializes them
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                   'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS')
+
+
+@contextmanager
+def _phase(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
+def _limit_threads(job, threads):
+    """Apply the budget to the frameworks themselves, right after they are imported"""
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(max(1, threads // 2))
+    if job == 'gan':
+        import torch  # CTGAN trains with PyTorch
+        torch.set_num_threads(threads)
+
+
+def _run_job(job, options, threads, results):
+    """Child process: set up, prepare data, fit, save; reports timings on the results queue"""
+    timings = {}
+    try:
+        with _phase(timings, 'setup'):
+            from HAR_system import HARSystem
+            _limit_threads(job, threads)
+            har_system = HARSystem(reduction=options['reduction'], n_components=options['n_components'])
+        with _phase(timings, 'prep'):
+            X, y = har_system.prepare_data(options['csv'])
+        if job == 'gan':
+            with _phase(timings, 'fit'):
+                har_system.train_gan(X, epochs=options['gan_epochs'])
+            with _phase(timings, 'save'):
+                har_system.save_gan(options['save_dir'])
+        else:
+            with _phase(timings, 'fit'):
+                har_system.train_hybrid_model(X, y, epochs=options['classifier_epochs'])
+                if options['cascade']:
+                    har_system.fit_cascade(X, y)
+            with _phase(timings, 'save'):
+                har_system.save_classifier(options['save_dir'])
+        results.put((job, timings, None))
+    except BaseException:
+        results.put((job, timings, traceback.format_exc()))
+
+
+@contextmanager
+def _thread_env(threads):
+    """Environment a child process inherits when started inside this block"""
+    saved = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+    os.environ.update({name: str(threads) for name in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _start(ctx, job, options, threads, results):
+    with _thread_env(threads):
+        process = ctx.Process(target=_run_job, args=(job, options, threads, results), name=f"train-{job}")
+        process.start()
+    return process
+
+
+def _finish(processes, report, started, job, timings, error):
+    """Record a job's reported result; results for jobs already recorded are ignored"""
+    if job not in processes:
+        return
+    processes.pop(job).join()
+    report['jobs'][job].update(phases=timings, total=sum(timings.values()), error=error,
+                               finished_at=time.perf_counter() - started)
+    status = f"failed:\n{error}" if error else "finished, artifacts saved"
+    print(f"[{time.perf_counter() - started:7.1f}s] {job} {status}")
+
+
+def _wait(processes, results, report, started):
+    """Collect job results as they arrive; a child that dies without reporting is a failure"""
+    while processes:
+        try:
+            _finish(processes, report, started, *results.get(timeout=1.0))
+            continue
+        except queue.Empty:
+            pass
+        for job, process in list(processes.items()):
+            if process.is_alive():
+                continue
+            # A child can report and exit right after get() timed out; its result is
+            # already in the queue, so drain it before calling the job failed
+            while True:
+                try:
+                    _finish(processes, report, started, *results.get_nowait())
+                except queue.Empty:
+                    break
+            if job in processes:
+                process.join()
+                del processes[job]
+                report['jobs'][job].update(error=f"Process exited with code {process.exitcode}",
+                                           finished_at=time.perf_counter() - started)
+
+
+def train(options, gan_threads, classifier_threads, sequential=False):
+    """Run both jobs (concurrently unless sequential) and return the timing report"""
+    # Spawned children start clean: no TensorFlow / torch state is copied from this process
+    ctx = mp.get_context('spawn')
+    results = ctx.Queue()
+    threads = {'gan': gan_threads, 'classifier': classifier_threads}
+    report = {
+        'created': datetime.now().isoformat(),
+        'mode': 'sequential' if sequential else 'concurrent',
+        'options': options,
+        'jobs': {job: {'threads': threads[job]} for job in JOBS},
+    }
+    started = time.perf_counter()
+
+    # Build the float32 dataset cache once, so the two jobs only memory-map it
+    from dataset_cache import load_dataset
+    with _phase(report, 'dataset_cache'):
+        load_dataset(options['csv'])
+
+    if sequential:
+        for job in JOBS:
+            _wait({job: _start(ctx, job, options, threads[job], results)}, results, report, started)
+    else:
+        processes = {job: _start(ctx, job, options, threads[job], results) for job in JOBS}
+        _wait(processes, results, report, started)
+    report['wall_clock'] = time.perf_counter() - started
+    return report
+
+
+def print_report(report):
+    print(f"\nTraining report ({report['mode']})")
+    print(f"{'job':<11} {'threads':>7} " + " ".join(f"{phase:>8}" for phase in PHASES) + f" {'total':>8}")
+    for job, result in report['jobs'].items():
+        phases = result.get('phases', {})
+        cells = " ".join(f"{phases[phase]:>7.1f}s" if phase in phases else f"{'-':>8}" for phase in PHASES)
+        total = f"{result['total']:>7.1f}s" if 'total' in result else f"{'-':>8}"
+        print(f"{job:<11} {result['threads']:>7} {cells} {total}{'  FAILED' if result.get('error') else ''}")
+    job_seconds = sum(result.get('total', 0.0) for result in report['jobs'].values())
+    print(f"dataset cache {report['dataset_cache']:.1f}s, wall clock {report['wall_clock']:.1f}s "
+          f"(jobs sum to {job_seconds:.1f}s)")
+
+
+def main():
+    cpus = os.cpu_count() or 2
+    parser = argparse.ArgumentParser(description="Train the GAN and hybrid classifier in parallel processes")
+    parser.add_argument('--csv', default='HAR_test.csv')
+    parser.add_argument('--save-dir', default='models')
+    parser.add_argument('--gan-epochs', type=int, default=50)
+    parser.add_argument('--classifier-epochs', type=int, default=20)
+    parser.add_argument('--gan-threads', type=int, default=max(1, cpus // 2))
+    parser.add_argument('--classifier-threads', type=int, default=max(1, cpus - cpus // 2))
+    parser.add_argument('--reduction', default='none', help="See feature_reduction.REDUCTIONS")
+    parser.add_argument('--components', type=int, default=64)
+    parser.add_argument('--no-cascade', action='store_true', help="Skip fitting the first-stage cascade")
+    parser.add_argument('--sequential', action='store_true', help="Run the jobs one after the other")
+    args = parser.parse_args()
+
+    options = {
+        'csv': args.csv,
+        'save_dir': args.save_dir,
+        'gan_epochs': args.gan_epochs,
+        'classifier_epochs': args.classifier_epochs,
+        'reduction': args.reduction,
+        'n_components': args.components,
+        'cascade': not args.no_cascade,
+    }
+    report = train(options, args.gan_threads, args.classifier_threads, sequential=args.sequential)
+    print_report(report)
+
+    os.makedirs(args.save_dir, exist_ok=True)
+    with open(os.path.join(args.save_dir, REPORT_FILE), 'w') as f:
+        json.dump(report, f, indent=2)
+    failed = [job for job, result in report['jobs'].items() if result.get('error')]
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
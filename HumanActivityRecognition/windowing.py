@@ -0,0 +1,90 @@
+#windowing.py
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Windows copied per model.predict call when streaming
+DEFAULT_CHUNK_SIZE = 1024
+
+
+def num_windows(n_rows, window_size, stride=1):
+    """Number of complete windows that fit in n_rows"""
+    if window_size < 1 or stride < 1:
+        raise ValueError("window_size and stride must be >= 1")
+    if n_rows < window_size:
+        return 0
+    return (n_rows - window_size) // stride + 1
+
+
+def sliding_windows(X, window_size, stride=1):
+    """
+    Return a read-only strided view of shape (n_windows, window_size, n_features).
+    No rows are copied; window i covers X[i*stride : i*stride + window_size]
+    """
+    X = np.asarray(X)
+    if X.ndim != 2:
+        raise ValueError(f"Expected a 2D (rows, features) array, got shape {X.shape}")
+    if num_windows(len(X), window_size, stride) == 0:
+        return np.empty((0, window_size, X.shape[1]), dtype=X.dtype)
+
+    # sliding_window_view puts the window axis last: (n, features, window)
+    view = sliding_window_view(X, window_size, axis=0).transpose(0, 2, 1)
+    return view[::stride]
+
+
+def window_end_rows(n_rows, window_size, stride=1):
+    """Row index of the last row in every window (the row each label belongs to)"""
+    n = num_windows(n_rows, window_size, stride)
+    return np.arange(n) * stride + window_size - 1
+
+
+def window_labels(y, window_size, stride=1):
+    """Labels aligned with sliding_windows: each window takes the label of its last row"""
+    y = np.asarray(y)
+    return y[window_end_rows(len(y), window_size, stride)]
+
+
+def create_sequences(X, y, window_size=5, stride=1):
+    """Zero-copy replacement for the list-append create_sequences"""
+    return sliding_windows(X, window_size, stride), window_labels(y, window_size, stride)
+
+
+def iter_window_chunks(X, window_size, stride=1, chunk_size=DEFAULT_CHUNK_SIZE, dtype=np.float32):
+    """
+    Yield (end_rows, windows) chunks with windows copied into one preallocated buffer.
+    The buffer is reused between chunks, so consume each chunk before asking for the next
+    """
+    view = sliding_windows(X, window_size, stride)
+    total = len(view)
+    if total == 0:
+        return
+    ends = window_end_rows(len(X), window_size, stride)
+    buffer = np.empty((min(chunk_size, total),) + view.shape[1:], dtype=dtype)
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        out = buffer[:stop - start]
+        np.copyto(out, view[start:stop], casting='same_kind')
+        yield ends[start:stop], out
+
+
+def iter_window_predictions(model, X, window_size, stride=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream windows through model.predict chunk by chunk, yielding (end_rows, probabilities)"""
+    for ends, windows in iter_window_chunks(X, window_size, stride, chunk_size):
+        yield ends, model.predict(windows, batch_size=len(windows), verbose=0)
+
+
+def predict_windows(model, X, window_size, stride=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Predict every window of X with bounded input memory.
+    Returns (end_rows, probabilities); only the (n_windows, n_classes) output grows with X
+    """
+    ends = window_end_rows(len(X), window_size, stride)
+    probs = None
+    offset = 0
+    for _, chunk_probs in iter_window_predictions(model, X, window_size, stride, chunk_size):
+        if probs is None:
+            probs = np.empty((len(ends), chunk_probs.shape[1]), dtype=chunk_probs.dtype)
+        probs[offset:offset + len(chunk_probs)] = chunk_probs
+        offset += len(chunk_probs)
+    if probs is None:
+        probs = np.empty((0, 0), dtype=np.float32)
+    return ends, probs
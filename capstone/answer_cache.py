@@ -0,0 +1,124 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+MAX_ENTRIES = 1000
+TTL_SECONDS = 24 * 3600
+# Cosine similarity above which a different wording counts as the same question
+SIMILARITY_THRESHOLD = 0.95
+
+
+def normalize_question(text):
+    """Lower-case, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r'\s+', ' ', text).strip().lower().rstrip('?!. ')
+
+
+class AnswerCache:
+    """
+    Two-level cache of /predict responses.
+    Level 1 is an exact match on the normalized question. Level 2 embeds the question
+    and searches a FAISS inner-product index over the cached questions' unit vectors,
+    answering from the closest one above `similarity_threshold`. Entries remember the
+    index version they were answered against and are dropped once it changes; the
+    least recently used entry is evicted past `max_entries` and entries expire after
+    `ttl_seconds`
+    """
+
+    def __init__(self, embeddings, index_version, max_entries=MAX_ENTRIES, ttl_seconds=TTL_SECONDS,
+                 similarity_threshold=SIMILARITY_THRESHOLD):
+        self.embeddings = embeddings
+        self.index_version = index_version
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()   # normalized question -> entry, LRU order
+        self._by_id = {}                # FAISS id -> normalized question
+        self._next_id = 0
+        self._vectors = None            # Created on first insert, once the dimension is known
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        del self._by_id[entry['id']]
+        self._vectors.remove_ids(np.array([entry['id']], dtype=np.int64))
+
+    def _valid(self, key):
+        entry = self._entries[key]
+        if entry['index_version'] != self.index_version or time.time() - entry['created'] > self.ttl_seconds:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, question, embed=None):
+        """
+        (response, 'exact' | 'semantic', query vector) on a hit, else (None, None, query vector).
+        `embed` is called for the question's embedding only when there is no exact match,
+        and that vector is returned so retrieval can reuse it
+        """
+        key = normalize_question(question)
+        with self._lock:
+            if key in self._entries and self._valid(key):
+                self.exact_hits += 1
+                return self._entries[key]['response'], 'exact', None
+
+        query_vector = embed() if embed is not None else self.embeddings.embed_query(question)
+        vector = self._unit(query_vector)
+        with self._lock:
+            if self._vectors is not None and self._vectors.ntotal:
+                scores, ids = self._vectors.search(vector, 1)
+                match = self._by_id.get(int(ids[0, 0]))
+                if scores[0, 0] >= self.similarity_threshold and match in self._entries and self._valid(match):
+                    self.semantic_hits += 1
+                    return self._entries[match]['response'], 'semantic', query_vector
+            self.misses += 1
+        return None, None, query_vector
+
+    def put(self, question, response, vector=None):
+        """Cache a response; pass the vector returned by get() to skip re-embedding"""
+        import faiss
+        key = normalize_question(question)
+        vector = self._unit(vector if vector is not None else self.embeddings.embed_query(question))
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+            if key in self._entries:
+                self._remove(key)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[key] = {'id': entry_id, 'response': response,
+                                  'index_version': self.index_version, 'created': time.time()}
+            self._by_id[entry_id] = key
+            self._vectors.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def set_index_version(self, index_version):
+        """Call after reloading the index; answers from the old documents are dropped"""
+        with self._lock:
+            if index_version != self.index_version:
+                self.index_version = index_version
+                for key in list(self._entries):
+                    self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'exact_hits': self.exact_hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'hit_rate': (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+                'index_version': self.index_version,
+            }
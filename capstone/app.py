@@ -1,15 +1,15 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from dotenv import load_dotenv
+import json
 import os
-import time
-from langchain_groq import ChatGroq
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.prompts import ChatPromptTemplate
-from langchain.chains import create_retrieval_chain
-from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import PyPDFDirectoryLoader
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import threading
+from embedding_cache import make_embeddings
+from index_store import PDF_DIR, INDEX_DIR, MANIFEST_FILE, index_exists, index_version, load_index, sync_index
+from rag_chain import make_llm, make_prompt, RAGPipeline
+from context_packing import TOKEN_BUDGET
+from answer_cache import AnswerCache, MAX_ENTRIES, TTL_SECONDS, SIMILARITY_THRESHOLD
+import metrics
+from metrics import Trace
 
 app = Flask(__name__)
 
@@ -22,44 +22,117 @@ google_api_key = os.getenv('GOOGLE_API_KEY')
 # Initialize session state variables
 def initialize_session_state():
     if not hasattr(initialize_session_state, 'vectors'):
-        initialize_session_state.embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-        initialize_session_state.loader = PyPDFDirectoryLoader("./pdfFiles")  # Data Ingestion
-        initialize_session_state.docs = initialize_session_state.loader.load()  # Document Loading
-        initialize_session_state.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)  # Chunk Creation
-        initialize_session_state.final_documents = initialize_session_state.text_splitter.split_documents(initialize_session_state.docs[:20])  # Splitting
-        initialize_session_state.vectors = FAISS.from_documents(initialize_session_state.final_documents, initialize_session_state.embeddings)  # Vector creation
+        initialize_session_state.embeddings = make_embeddings()  # Cached, batched embeddings
+        # The index is built ahead of time by ingest.py; only build here if it was never run
+        if not index_exists(INDEX_DIR):
+            sync_index(initialize_session_state.embeddings, PDF_DIR, INDEX_DIR)
+        initialize_session_state.vectors = load_index(initialize_session_state.embeddings, INDEX_DIR)  # Memory-mapped load
 
-llm = ChatGroq(groq_api_key=groq_api_key, model_name="gemma-7b-it")
+llm = make_llm(groq_api_key)  # One client, one pooled HTTP connection set
 
-prompt = ChatPromptTemplate.from_template(
-    """
-    Answer the questions based on the provided context only.
-    Please provide the most accurate response based on the question
-    <context>
-        {context}
-    <context>
-    Questions:{input}
-    """
+prompt = make_prompt()
+
+# Load the saved index and build the pipeline once at startup; every request shares it
+initialize_session_state()
+pipeline = RAGPipeline(initialize_session_state.vectors, llm, prompt,
+                       token_budget=int(os.getenv('CONTEXT_TOKEN_BUDGET', TOKEN_BUDGET)))
+
+# Repeated (or reworded) questions are answered without retrieval or an LLM call
+answer_cache = AnswerCache(
+    initialize_session_state.embeddings,
+    index_version(INDEX_DIR),
+    max_entries=int(os.getenv('ANSWER_CACHE_SIZE', MAX_ENTRIES)),
+    ttl_seconds=float(os.getenv('ANSWER_CACHE_TTL', TTL_SECONDS)),
+    similarity_threshold=float(os.getenv('ANSWER_CACHE_THRESHOLD', SIMILARITY_THRESHOLD)),
 )
 
-def retrieve_documents(input_prompt):
-    initialize_session_state()
+def _manifest_mtime():
+    try:
+        return os.stat(os.path.join(INDEX_DIR, MANIFEST_FILE)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+_index_mtime = _manifest_mtime()
+_index_lock = threading.Lock()
 
-    # Create document chain and retrieval chain
-    document_chain = create_stuff_documents_chain(llm, prompt)
-    retriever = initialize_session_state.vectors.as_retriever()
-    retrieval_chain = create_retrieval_chain(retriever, document_chain)
+def refresh_index():
+    """Pick up an index synced or rebuilt by ingest.py: reload it and drop answers cached against the old one"""
+    global _index_mtime
+    if _manifest_mtime() == _index_mtime:
+        return
+    with _index_lock:
+        mtime = _manifest_mtime()
+        # None while ingest.py swaps the new index directory in; keep serving the old one
+        if mtime is None or mtime == _index_mtime:
+            return
+        initialize_session_state.vectors = load_index(initialize_session_state.embeddings, INDEX_DIR)
+        pipeline.vectors = initialize_session_state.vectors
+        answer_cache.set_index_version(index_version(INDEX_DIR))
+        _index_mtime = mtime
 
-    # Measure response time
-    start = time.process_time()
-    response = retrieval_chain.invoke({'input': input_prompt})
-    response_time = time.process_time() - start
+def retrieve_documents(input_prompt, trace):
+    # Wall-clock spans per stage; the query embedding is shared by the cache and retrieval
+    result, cache_level, query_vector = answer_cache.get(input_prompt, lambda: pipeline.embed_query(input_prompt, trace))
+    if result is None:
+        docs, context_tokens = pipeline.pack(pipeline.search(query_vector, trace), trace)
+        messages = pipeline.build_messages(input_prompt, docs, trace)
+        result = {
+            'answer': pipeline.generate(messages, trace),
+            'context': [doc.page_content for doc in docs],
+            'context_tokens': context_tokens
+        }
+        answer_cache.put(input_prompt, result, query_vector)
+    response_time = trace.elapsed()
+    metrics.record(trace, 'json', cache_level)
 
     return {
         'response_time': response_time,
-        'answer': response['answer'],
-        'context': [doc.page_content for doc in response["context"]]
+        'answer': result['answer'],
+        'context': result['context'],
+        'context_tokens': result['context_tokens'],
+        'cache': cache_level
+    }
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_documents(input_prompt, trace, debug=False):
+    """
+    Server-Sent Events for one question: `context` (retrieved chunks) first, then one
+    `token` event per LLM chunk, then `done` with time-to-first-token and total latency
+    """
+    first_token = None
+    try:
+        result, cache_level, query_vector = answer_cache.get(input_prompt, lambda: pipeline.embed_query(input_prompt, trace))
+        if result is not None:
+            yield sse('context', result['context'])
+            first_token = trace.elapsed()
+            yield sse('token', {'text': result['answer']})
+        else:
+            docs, context_tokens = pipeline.pack(pipeline.search(query_vector, trace), trace)
+            context = [doc.page_content for doc in docs]
+            yield sse('context', context)
+            tokens = []
+            for token in pipeline.stream_tokens(pipeline.build_messages(input_prompt, docs, trace), trace):
+                if first_token is None:
+                    first_token = trace.elapsed()
+                tokens.append(token)
+                yield sse('token', {'text': token})
+            result = {'answer': ''.join(tokens), 'context': context, 'context_tokens': context_tokens}
+            answer_cache.put(input_prompt, result, query_vector)
+    except Exception as e:
+        yield sse('error', {'error': str(e)})
+        return
+    metrics.record(trace, 'stream', cache_level, first_token)
+    done = {
+        'time_to_first_token': first_token,
+        'response_time': trace.elapsed(),
+        'context_tokens': result['context_tokens'],
+        'cache': cache_level
     }
+    if debug:
+        done['timings_ms'] = trace.as_ms()
+    yield sse('done', done)
 
 @app.route('/')
 def index():
@@ -69,15 +142,44 @@ def index():
 def predict():
     data = request.get_json()
     input_prompt = data.get('message', '')
+    # Streaming mode: {"stream": true} or an Accept: text/event-stream header
+    streaming = data.get('stream') or 'text/event-stream' in request.headers.get('Accept', '')
+    # {"debug": true} adds per-stage timings (ms) to the response
+    debug = bool(data.get('debug'))
+    trace = Trace()
+    refresh_index()
 
+    if input_prompt and streaming:
+        return Response(stream_with_context(stream_documents(input_prompt, trace, debug)), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
     if input_prompt:
-        response = retrieve_documents(input_prompt)
-        return jsonify({
+        response = retrieve_documents(input_prompt, trace)
+        body = {
             'answer': response['answer'],
             'response_time': response['response_time'],
-            'context': response['context']
-        })
+            'context': response['context'],
+            'context_tokens': response['context_tokens'],
+            'cache': response['cache']
+        }
+        if debug:
+            body['timings_ms'] = trace.as_ms()
+        return jsonify(body)
     return jsonify({'answer': 'No input provided.'})
 
+@app.route('/cache-stats')
+def cache_stats():
+    return jsonify(answer_cache.stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    stats = answer_cache.stats()
+    cache_lines = [
+        "# TYPE rag_answer_cache_lookups_total counter",
+        f'rag_answer_cache_lookups_total{{result="exact"}} {stats["exact_hits"]}',
+        f'rag_answer_cache_lookups_total{{result="semantic"}} {stats["semantic_hits"]}',
+        f'rag_answer_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+    ]
+    return Response(metrics.render(cache_lines), mimetype='text/plain; version=0.0.4')
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,102 @@
+"""
+Per-request answering overhead of rebuilding the retriever + retrieval chain on every call
+(the old /predict behaviour), measured against the same chain built once and reused, so
+the saving is from building once alone. The RAGPipeline the app runs stage by stage is
+reported as its own row. The LLM is a stub and the embeddings are local, so the numbers
+are the orchestration overhead only.
+
+    python bench_chain.py --docs 2000 --requests 500 --threads 8
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from langchain.chains import create_retrieval_chain
+from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_community.vectorstores import FAISS
+from embedding_cache import HashEmbeddings
+from metrics import Trace
+from rag_chain import make_prompt, RAGPipeline
+
+
+def make_vectorstore(num_docs, dim):
+    docs = [Document(page_content=f"Syllabus section {i}: topic {i % 97}, week {i % 14}.",
+                     metadata={'source': f"doc{i // 50}.pdf", 'page': i % 50}) for i in range(num_docs)]
+    return FAISS.from_documents(docs, HashEmbeddings(dim))
+
+
+def answer(pipeline, question, trace):
+    """The stages app.retrieve_documents runs on an answer-cache miss"""
+    docs, _ = pipeline.pack(pipeline.search(pipeline.embed_query(question, trace), trace), trace)
+    return pipeline.generate(pipeline.build_messages(question, docs, trace), trace)
+
+
+def run(invoke, questions, threads):
+    start = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(invoke, questions))
+    else:
+        for question in questions:
+            invoke(question)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request retrieval overhead")
+    parser.add_argument('--docs', type=int, default=2000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=1)
+    args = parser.parse_args()
+
+    vectors = make_vectorstore(args.docs, args.dim)
+    llm = FakeListChatModel(responses=["Stub answer."])
+    prompt = make_prompt()
+    questions = [f"What is covered in week {i % 14}?" for i in range(args.requests)]
+
+    def build_chain():
+        return create_retrieval_chain(vectors.as_retriever(), create_stuff_documents_chain(llm, prompt))
+
+    def per_request(question):
+        return build_chain().invoke({'input': question})
+
+    chain = build_chain()
+
+    def built_once(question):
+        return chain.invoke({'input': question})
+
+    pipeline = RAGPipeline(vectors, llm, prompt)
+    traces = []
+
+    def shared(question):
+        trace = Trace()
+        result = answer(pipeline, question, trace)
+        traces.append(trace)
+        return result
+
+    # Warm up every path once
+    per_request(questions[0])
+    built_once(questions[0])
+    shared(questions[0])
+    traces.clear()
+
+    build_s = run(per_request, questions, args.threads)
+    once_s = run(built_once, questions, args.threads)
+    shared_s = run(shared, questions, args.threads)
+    print(f"{args.docs} docs, {args.requests} requests, {args.threads} thread(s)")
+    print(f"build chain per request  {build_s / args.requests * 1000:7.3f} ms/request")
+    print(f"chain built once         {once_s / args.requests * 1000:7.3f} ms/request")
+    print(f"saved by building once   {(build_s - once_s) / args.requests * 1000:7.3f} ms/request")
+    print(f"RAGPipeline (app path)   {shared_s / args.requests * 1000:7.3f} ms/request")
+    stages = {}
+    for trace in traces:
+        for name, seconds in trace.spans.items():
+            stages[name] = stages.get(name, 0.0) + seconds
+    print("pipeline stages  " + "  ".join(f"{name} {seconds / len(traces) * 1000:.3f} ms"
+                                          for name, seconds in stages.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Recall vs latency of the FAISS index types against the exact Flat baseline on a
+synthetic clustered corpus. Queries are searched one at a time, as /predict does.
+
+    python bench_index.py --vectors 100000 --dim 768 --queries 500
+    python bench_index.py --configs "HNSW32:efSearch=32|efSearch=128" "IVF1024,PQ32:nprobe=16"
+"""
+import argparse
+import time
+import numpy as np
+from index_store import build_ann_index, set_search_params
+from rag_chain import TOP_K
+
+# index type : search-parameter settings to sweep (separated by "|")
+DEFAULT_CONFIGS = [
+    "Flat",
+    "IVF1024,Flat:nprobe=1|nprobe=8|nprobe=32",
+    "HNSW32:efSearch=16|efSearch=64|efSearch=128",
+    "IVF1024,PQ32:nprobe=8|nprobe=32",
+    "SQ8",
+]
+
+
+def make_corpus(num_vectors, num_queries, dim, clusters=200, seed=0):
+    """Gaussian clusters, like topic-grouped chunk embeddings; queries are drawn from the same clusters"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+
+    def sample(n):
+        return centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return sample(num_vectors), sample(num_queries)
+
+
+def search_all(index, queries, k):
+    latencies = np.empty(len(queries))
+    results = np.empty((len(queries), k), dtype=np.int64)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, results[i] = index.search(query.reshape(1, -1), k)
+        latencies[i] = time.perf_counter() - start
+    return results, latencies
+
+
+def recall(results, truth):
+    return np.mean([len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types: recall vs latency")
+    parser.add_argument('--vectors', type=int, default=50000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=TOP_K)
+    parser.add_argument('--configs', nargs='+', default=DEFAULT_CONFIGS)
+    args = parser.parse_args()
+
+    import faiss
+    corpus, queries = make_corpus(args.vectors, args.queries, args.dim)
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, recall@{args.k}")
+    print(f"{'index':<16} {'search params':<14} {'build s':>8} {'size MB':>8} {'recall':>7} "
+          f"{'mean ms':>8} {'p95 ms':>8}")
+
+    truth = None
+    for config in args.configs:
+        index_type, _, params = config.partition(':')
+        start = time.perf_counter()
+        index = build_ann_index(corpus, index_type)
+        build_s = time.perf_counter() - start
+        size_mb = faiss.serialize_index(index).nbytes / 1e6
+        for search_params in params.split('|'):
+            set_search_params(index, search_params)
+            results, latencies = search_all(index, queries, args.k)
+            if truth is None:
+                if index_type != 'Flat':
+                    raise SystemExit("The first config must be Flat (the exact baseline)")
+                truth = results
+            print(f"{index_type:<16} {search_params or '-':<14} {build_s:8.2f} {size_mb:8.1f} "
+                  f"{recall(results, truth):7.3f} {latencies.mean() * 1000:8.3f} "
+                  f"{np.percentile(latencies, 95) * 1000:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import re
+from langchain_core.documents import Document
+
+# Prompt tokens allowed for retrieved context
+TOKEN_BUDGET = 1500
+# Share of a chunk's word shingles already in the context above which it is a near-duplicate
+NEAR_DUPLICATE_THRESHOLD = 0.85
+SHINGLE_SIZE = 5
+# Shortest shared prefix/suffix treated as splitter overlap rather than coincidence
+MIN_OVERLAP_CHARS = 30
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English text; no tokenizer for the hosted model ships locally
+    return max(1, (len(text) + 3) // 4)
+
+
+def _text_overlap(a, b):
+    """Length of the longest suffix of a that is a prefix of b (0 if under MIN_OVERLAP_CHARS)"""
+    head = b[:MIN_OVERLAP_CHARS]
+    if len(head) < MIN_OVERLAP_CHARS:
+        return 0
+    start = a.find(head, max(0, len(a) - len(b)))
+    while start != -1:
+        if b.startswith(a[start:]):
+            return len(a) - start
+        start = a.find(head, start + 1)
+    return 0
+
+
+def _join(a, b):
+    """a and b merged into one span if they overlap or touch in the source page, else None"""
+    if a.metadata.get('source') != b.metadata.get('source') or a.metadata.get('page') != b.metadata.get('page'):
+        return None
+    start_a, start_b = a.metadata.get('start_index'), b.metadata.get('start_index')
+    if start_a is not None and start_b is not None:
+        # Offsets from the splitter (add_start_index) also catch chunks that touch without overlapping
+        if start_b < start_a:
+            a, b, start_a, start_b = b, a, start_b, start_a
+        end_a = start_a + len(a.page_content)
+        if start_b > end_a + 1:
+            return None
+        if start_b + len(b.page_content) <= end_a:
+            return a
+        if start_b > end_a:
+            # One character between them, dropped by the splitter (whitespace it stripped)
+            text = a.page_content + ' ' + b.page_content
+        else:
+            text = a.page_content + b.page_content[end_a - start_b:]
+        return Document(page_content=text, metadata=a.metadata)
+    if b.page_content in a.page_content:
+        return a
+    if a.page_content in b.page_content:
+        return b
+    for first, second in ((a, b), (b, a)):
+        overlap = _text_overlap(first.page_content, second.page_content)
+        if overlap:
+            return Document(page_content=first.page_content + second.page_content[overlap:], metadata=first.metadata)
+    return None
+
+
+def _shingles(text):
+    words = re.findall(r'\w+', text.lower())
+    return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))}
+
+
+def pack_context(docs, token_budget=TOKEN_BUDGET, near_duplicate_threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Retrieved chunks (best first) -> (context documents, token stats).
+    Overlapping or adjacent chunks of the same page are merged into one span (keeping the
+    better rank), near-duplicates are dropped, and spans are taken in rank order until
+    token_budget is spent; a first span larger than the budget is truncated
+    """
+    tokens_before = sum(estimate_tokens(doc.page_content) for doc in docs)
+
+    # Merge pairwise until nothing changes, since one merge can make two spans touch;
+    # the merged span takes the place of the better-ranked part
+    spans = list(docs)
+    merged_any = True
+    while merged_any:
+        merged_any = False
+        for i in range(len(spans)):
+            for j in range(i + 1, len(spans)):
+                merged = _join(spans[i], spans[j])
+                if merged is not None:
+                    spans[i] = merged
+                    del spans[j]
+                    merged_any = True
+                    break
+            if merged_any:
+                break
+
+    # Containment rather than pairwise similarity, so text repeated inside a longer
+    # merged span (or across several kept spans) is caught too
+    kept, seen = [], set()
+    for span in spans:
+        shingles = _shingles(span.page_content)
+        if len(shingles & seen) >= near_duplicate_threshold * len(shingles):
+            continue
+        kept.append(span)
+        seen |= shingles
+
+    packed, used = [], 0
+    for span in kept:
+        tokens = estimate_tokens(span.page_content)
+        if used + tokens > token_budget:
+            if not packed:
+                packed.append(Document(page_content=span.page_content[:token_budget * 4], metadata=span.metadata))
+                used = estimate_tokens(packed[0].page_content)
+            continue
+        packed.append(span)
+        used += tokens
+
+    return packed, {
+        'chunks_retrieved': len(docs),
+        'chunks_sent': len(packed),
+        'tokens_before': tokens_before,
+        'tokens_after': used,
+        'tokens_saved': tokens_before - used,
+    }
@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = "./embedding_cache.sqlite"
+
+
+def text_key(text, model_name):
+    """Cache key: hash of the model name and the exact chunk text"""
+    return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding store in a local SQLite file (float32 blobs)"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    def _connect(self):
+        # sqlite3 connections cannot be shared across threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        found = {}
+        conn = self._connect()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch)
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items])
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper that only sends cache misses to the provider.
+    Misses are de-duplicated and embedded in batches of `batch_size` texts, with up to
+    `max_concurrency` batches in flight, and each batch is retried with exponential
+    backoff. Any Embeddings implementation can be the provider, including a local
+    deterministic one for tests
+    """
+
+    def __init__(self, provider, model_name, cache=None, batch_size=100, max_concurrency=4,
+                 max_retries=5, backoff_base=1.0, cache_queries=False):
+        self.provider = provider
+        self.model_name = model_name
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.cache_queries = cache_queries
+        self.hits = 0
+        self.misses = 0
+
+    def _embed_batch(self, texts):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.provider.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_base * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"Embedding batch failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def embed_documents(self, texts):
+        keys = [text_key(text, self.model_name) for text in texts]
+        cached = self.cache.get_many(list(set(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        self.hits += len(texts) - sum(1 for key in keys if key in missing)
+        self.misses += len(missing)
+
+        if missing:
+            miss_keys = list(missing)
+            batches = [miss_keys[i:i + self.batch_size] for i in range(0, len(miss_keys), self.batch_size)]
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                results = pool.map(lambda batch: self._embed_batch([missing[k] for k in batch]), batches)
+                for batch, vectors in zip(batches, results):
+                    items = list(zip(batch, vectors))
+                    self.cache.put_many(items)
+                    cached.update({key: np.asarray(vector, dtype=np.float32) for key, vector in items})
+
+        return [cached[key].tolist() for key in keys]
+
+    def embed_query(self, text):
+        if self.cache_queries:
+            return self.embed_documents([text])[0]
+        return self.provider.embed_query(text)
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic local embeddings (seeded by the text hash) for offline runs and tests"""
+
+    def __init__(self, dim=768):
+        self.dim = dim
+
+    def _vector(self, text):
+        seed = int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:16], 16)
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def make_embeddings(provider_name=None, model_name="models/embedding-001", cache_path=CACHE_PATH):
+    """
+    Embeddings used by the app and ingestion, wrapped in the local cache.
+    EMBEDDINGS_PROVIDER=google (default) calls Gemini; =hash uses HashEmbeddings offline
+    """
+    provider_name = provider_name or os.getenv('EMBEDDINGS_PROVIDER', 'google')
+    if provider_name == 'hash':
+        provider, model_name = HashEmbeddings(), 'hash-768'
+    elif provider_name == 'google':
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        provider = GoogleGenerativeAIEmbeddings(model=model_name)
+    else:
+        raise ValueError(f"Unknown embeddings provider '{provider_name}'")
+    return CachedEmbeddings(provider, model_name, cache=EmbeddingCache(cache_path))
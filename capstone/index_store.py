@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.document_loaders import PyPDFLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+PDF_DIR = "./pdfFiles"
+INDEX_DIR = "./faiss_index"
+MANIFEST_FILE = "manifest.json"
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# faiss.index_factory string with its build parameters: "Flat" (exact), "IVF1024,Flat",
+# "HNSW32", "IVF1024,PQ32", "SQ8", ... Non-flat indexes are rebuilt from exact vectors on sync
+INDEX_TYPE = os.getenv('FAISS_INDEX_TYPE', 'Flat')
+# faiss.ParameterSpace string applied when the index is loaded, e.g. "nprobe=16" or "efSearch=128"
+SEARCH_PARAMS = os.getenv('FAISS_SEARCH_PARAMS', '')
+
+
+def file_sha256(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def list_pdfs(pdf_dir):
+    """PDF paths under pdf_dir, keyed by their path relative to it"""
+    pdfs = {}
+    for root, _, files in os.walk(pdf_dir):
+        for name in sorted(files):
+            if name.lower().endswith('.pdf'):
+                path = os.path.join(root, name)
+                pdfs[os.path.relpath(path, pdf_dir)] = path
+    return pdfs
+
+
+def index_exists(index_dir=INDEX_DIR):
+    return os.path.exists(os.path.join(index_dir, 'index.faiss'))
+
+
+def load_manifest(index_dir=INDEX_DIR):
+    """{'files': {relative path: {'sha256': ..., 'chunk_ids': [...]}}}"""
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {'files': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def index_version(index_dir=INDEX_DIR):
+    """Short hash of the indexed files' contents; changes whenever the index does"""
+    files = load_manifest(index_dir)['files']
+    h = hashlib.sha256()
+    for rel in sorted(files):
+        h.update(f"{rel}\0{files[rel]['sha256']}\n".encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def chunk_ids(rel, sha256, count):
+    # Derived from the relative path and the content, so the same file always maps to the
+    # same vectors and byte-identical PDFs under different names never share an id
+    key = hashlib.sha256(f"{rel}\0{sha256}".encode('utf-8')).hexdigest()
+    return [f"{key[:16]}-{i}" for i in range(count)]
+
+
+def split_pdf(path, text_splitter=None):
+    """All pages of one PDF, split into chunks"""
+    return parse_pdf(path, text_splitter)[2]
+
+
+def parse_pdf(path, text_splitter=None):
+    """Parse and chunk one PDF; returns (path, page count, chunks). Runs in worker processes"""
+    # start_index lets retrieval merge overlapping/adjacent chunks of a page exactly
+    text_splitter = text_splitter or RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+                                                                    add_start_index=True)
+    pages = PyPDFLoader(path).load()
+    return path, len(pages), text_splitter.split_documents(pages)
+
+
+def iter_parsed_pdfs(paths, text_splitter=None, max_workers=None):
+    """
+    Parse PDFs across a process pool and yield (path, page count, chunks, parsed_at) per
+    file as soon as it finishes; parsed_at is the perf_counter() time the parse finished,
+    not when the caller got to it. At most 2 x max_workers files are in flight, so parsed
+    chunks waiting for the embedding stage never pile up beyond that
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(paths) <= 1:
+        for path in paths:
+            yield (*parse_pdf(path, text_splitter), time.perf_counter())
+        return
+
+    pending = list(reversed(paths))
+    parsed_at = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = set()
+        while pending or in_flight:
+            while pending and len(in_flight) < 2 * max_workers:
+                future = pool.submit(parse_pdf, pending.pop(), text_splitter)
+                future.add_done_callback(lambda f: parsed_at.setdefault(f, time.perf_counter()))
+                in_flight.add(future)
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield (*future.result(), parsed_at.pop(future))
+
+
+def build_ann_index(vectors, index_type=INDEX_TYPE):
+    """Index of the given factory type over vectors (row i gets id i), trained first if the type needs it"""
+    import faiss
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = faiss.index_factory(vectors.shape[1], index_type, faiss.METRIC_L2)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def set_search_params(index, search_params=SEARCH_PARAMS):
+    if search_params:
+        import faiss
+        faiss.ParameterSpace().set_index_parameters(index, search_params)
+
+
+def load_index(embeddings, index_dir=INDEX_DIR, mmap=True, search_params=SEARCH_PARAMS):
+    """
+    Load a saved index. With mmap the vectors are memory-mapped read-only, so pages are
+    shared between worker processes instead of each holding a private copy
+    """
+    import faiss
+    index_path = os.path.join(index_dir, 'index.faiss')
+    index = None
+    if mmap:
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            # Not every index type supports mmap; fall back to a regular read
+            index = None
+    if index is None:
+        index = faiss.read_index(index_path)
+    set_search_params(index, search_params)
+    with open(os.path.join(index_dir, 'index.pkl'), 'rb') as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def _as_flat(vectorstore, embeddings):
+    """
+    Exact copy of a loaded ANN index so documents can be removed and added incrementally.
+    Vectors come back from the embeddings (cache hits), since PQ/SQ codes are lossy and
+    HNSW cannot remove ids
+    """
+    import faiss
+    if isinstance(vectorstore.index, faiss.IndexFlat):
+        return vectorstore
+    ids = [vectorstore.index_to_docstore_id[i] for i in range(vectorstore.index.ntotal)]
+    texts = [vectorstore.docstore.search(doc_id).page_content for doc_id in ids]
+    flat = faiss.IndexFlatL2(vectorstore.index.d)
+    if texts:
+        flat.add(np.asarray(embeddings.embed_documents(texts), dtype=np.float32))
+    return FAISS(embeddings, flat, vectorstore.docstore, dict(enumerate(ids)))
+
+
+def _to_ann(vectorstore, embeddings, index_type):
+    index = vectorstore.index
+    try:
+        ann = build_ann_index(index.reconstruct_n(0, index.ntotal), index_type)
+    except RuntimeError as e:
+        # e.g. IVF with more lists than vectors; a corpus this small is fine with exact search
+        print(f"Could not build a {index_type} index over {index.ntotal} vectors ({e}); keeping Flat")
+        return vectorstore, 'Flat'
+    return FAISS(embeddings, ann, vectorstore.docstore, vectorstore.index_to_docstore_id), index_type
+
+
+def _save(vectorstore, manifest, index_dir):
+    """Write index + manifest to a sibling directory and swap it in"""
+    tmp_dir = f"{index_dir}.tmp"
+    old_dir = f"{index_dir}.old"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    vectorstore.save_local(tmp_dir)
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(index_dir):
+        os.replace(index_dir, old_dir)
+    os.replace(tmp_dir, index_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def sync_index(embeddings, pdf_dir=PDF_DIR, index_dir=INDEX_DIR, text_splitter=None, max_workers=None,
+               index_type=INDEX_TYPE):
+    """
+    Bring the saved index in line with pdf_dir.
+    Only new or changed PDFs are parsed (in parallel) and embedded, each file's chunks
+    going to the index as soon as that file is parsed; vectors of changed or deleted
+    PDFs are removed. Updates happen on an exact index, which is then rebuilt as
+    index_type if that is not Flat. Returns counts of what changed, parse throughput
+    (against the parse/chunk stage alone) and end-to-end throughput (against the whole sync)
+    """
+    start = time.perf_counter()
+    manifest = load_manifest(index_dir)
+    indexed = manifest['files']
+    pdfs = list_pdfs(pdf_dir)
+    hashes = {rel: file_sha256(path) for rel, path in pdfs.items()}
+
+    stale = [rel for rel, entry in indexed.items() if hashes.get(rel) != entry['sha256']]
+    fresh = [rel for rel, sha in hashes.items() if rel not in indexed or indexed[rel]['sha256'] != sha]
+    stats = {'added_files': len(fresh), 'removed_files': len(stale),
+             'added_chunks': 0, 'removed_chunks': 0, 'unchanged_files': len(pdfs) - len(fresh),
+             'pages': 0, 'parse_seconds': 0.0, 'pages_per_sec': 0.0, 'chunks_per_sec': 0.0,
+             'seconds': 0.0, 'end_to_end_pages_per_sec': 0.0, 'end_to_end_chunks_per_sec': 0.0,
+             'index_type': manifest.get('index_type', 'Flat')}
+    if not stale and not fresh and index_exists(index_dir) and stats['index_type'] == index_type:
+        return stats
+
+    vectorstore = None
+    if index_exists(index_dir):
+        vectorstore = _as_flat(load_index(embeddings, index_dir, mmap=False, search_params=''), embeddings)
+
+    stale_ids = [cid for rel in stale for cid in indexed.pop(rel)['chunk_ids']]
+    if stale_ids and vectorstore is not None:
+        vectorstore.delete(stale_ids)
+        stats['removed_chunks'] = len(stale_ids)
+
+    rel_by_path = {pdfs[rel]: rel for rel in fresh}
+    # The parse/chunk stage runs from here until the last PDF is parsed; embedding overlaps it
+    parse_start = parse_end = time.perf_counter()
+    for path, num_pages, docs, parsed_at in iter_parsed_pdfs([pdfs[rel] for rel in fresh], text_splitter,
+                                                             max_workers):
+        parse_end = max(parse_end, parsed_at)
+        rel = rel_by_path[path]
+        ids = chunk_ids(rel, hashes[rel], len(docs))
+        if docs:
+            if vectorstore is None:
+                vectorstore = FAISS.from_documents(docs, embeddings, ids=ids)
+            else:
+                vectorstore.add_documents(docs, ids=ids)
+        indexed[rel] = {'sha256': hashes[rel], 'chunk_ids': ids}
+        stats['added_chunks'] += len(ids)
+        stats['pages'] += num_pages
+
+    if vectorstore is None:
+        raise ValueError(f"No text found in any PDF under {pdf_dir}")
+    if index_type != 'Flat':
+        vectorstore, index_type = _to_ann(vectorstore, embeddings, index_type)
+    manifest['index_type'] = stats['index_type'] = index_type
+    _save(vectorstore, manifest, index_dir)
+
+    parse_s = parse_end - parse_start
+    stats['parse_seconds'] = parse_s
+    stats['pages_per_sec'] = stats['pages'] / parse_s if parse_s else 0.0
+    stats['chunks_per_sec'] = stats['added_chunks'] / parse_s if parse_s else 0.0
+    elapsed = time.perf_counter() - start
+    stats['seconds'] = elapsed
+    stats['end_to_end_pages_per_sec'] = stats['pages'] / elapsed if elapsed else 0.0
+    stats['end_to_end_chunks_per_sec'] = stats['added_chunks'] / elapsed if elapsed else 0.0
+    return stats
@@ -0,0 +1,50 @@
+"""
+Build or update the FAISS index ahead of time so the web app only has to load it.
+
+    python ingest.py                 # embed new/changed PDFs, drop removed ones
+    python ingest.py --rebuild       # re-index everything (cached embeddings are reused)
+    python ingest.py --index-type HNSW32   # switch the index type (no PDFs re-parsed)
+"""
+import argparse
+import shutil
+import time
+from dotenv import load_dotenv
+from embedding_cache import make_embeddings
+from index_store import PDF_DIR, INDEX_DIR, INDEX_TYPE, sync_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the PDF vector index")
+    parser.add_argument('--pdf-dir', default=PDF_DIR)
+    parser.add_argument('--index-dir', default=INDEX_DIR)
+    parser.add_argument('--rebuild', action='store_true', help="Discard the existing index first")
+    parser.add_argument('--workers', type=int, default=None, help="PDF parsing processes (default: CPU count)")
+    parser.add_argument('--index-type', default=INDEX_TYPE,
+                        help="faiss.index_factory string, e.g. Flat, IVF1024,Flat, HNSW32, IVF1024,PQ32, SQ8")
+    parser.add_argument('--embeddings', choices=['google', 'hash'], default=None,
+                        help="Embeddings provider (default: EMBEDDINGS_PROVIDER or google)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.rebuild:
+        shutil.rmtree(args.index_dir, ignore_errors=True)
+
+    start = time.perf_counter()
+    embeddings = make_embeddings(args.embeddings)
+    stats = sync_index(embeddings, args.pdf_dir, args.index_dir, max_workers=args.workers,
+                       index_type=args.index_type)
+    print(f"Index {args.index_dir} up to date in {time.perf_counter() - start:.1f}s: "
+          f"{stats['added_files']} files added/changed ({stats['added_chunks']} chunks), "
+          f"{stats['removed_files']} removed ({stats['removed_chunks']} chunks), "
+          f"{stats['unchanged_files']} unchanged; {stats['index_type']} index; "
+          f"embedding cache {embeddings.hits} hits / {embeddings.misses} misses")
+    if stats['pages']:
+        print(f"Parsed {stats['pages']} pages at {stats['pages_per_sec']:.1f} pages/s, "
+              f"{stats['added_chunks']} chunks at {stats['chunks_per_sec']:.1f} chunks/s "
+              f"({stats['parse_seconds']:.1f}s parse/chunk stage)")
+        print(f"End to end {stats['end_to_end_pages_per_sec']:.1f} pages/s, "
+              f"{stats['end_to_end_chunks_per_sec']:.1f} chunks/s ({stats['seconds']:.1f}s incl. embedding and save)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds); LLM generation needs the long tail
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Trace:
+    """Wall-clock spans of one request, summed per stage name"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = {}
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] = self.spans.get(name, 0.0) + time.perf_counter() - start
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def as_ms(self):
+        return {name: round(seconds * 1000, 3) for name, seconds in self.spans.items()}
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set, in the Prometheus text format"""
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += seconds
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = [f'{name}="{value}"' for name, value in zip(self.label_names, key)]
+                for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+                    bucket_labels = ','.join(labels + [f'le="{bound}"'])
+                    lines.append(f"{self.name}_bucket{{{bucket_labels}}} {count}")
+                suffix = f"{{{','.join(labels)}}}" if labels else ''
+                lines.append(f"{self.name}_sum{suffix} {series[-1]}")
+                lines.append(f"{self.name}_count{suffix} {series[-2]}")
+        return '\n'.join(lines)
+
+
+stage_seconds = Histogram('rag_stage_seconds', "Wall-clock time per RAG pipeline stage", ['stage'])
+request_seconds = Histogram('rag_request_seconds', "End-to-end /predict latency", ['mode', 'cache'])
+first_token_seconds = Histogram('rag_time_to_first_token_seconds', "Time to the first streamed token", ['cache'])
+
+
+def record(trace, mode, cache_level, first_token=None):
+    """Fold one finished request's spans into the histograms"""
+    for stage, seconds in trace.spans.items():
+        stage_seconds.observe(seconds, stage=stage)
+    request_seconds.observe(trace.elapsed(), mode=mode, cache=cache_level or 'miss')
+    if first_token is not None:
+        first_token_seconds.observe(first_token, cache=cache_level or 'miss')
+
+
+def render(extra_lines=()):
+    return '\n'.join([h.render() for h in (stage_seconds, request_seconds, first_token_seconds)]
+                     + list(extra_lines)) + '\n'
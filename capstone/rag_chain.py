@@ -0,0 +1,94 @@
+import os
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompts import format_document, PromptTemplate
+from context_packing import TOKEN_BUDGET, pack_context
+
+LLM_MODEL = "gemma-7b-it"
+# Keep-alive connections the shared Groq client may hold open
+LLM_MAX_CONNECTIONS = 20
+
+# LLM_PROVIDER=fake streams this canned answer locally, one character per delay
+FAKE_ANSWER = "This is a locally generated answer used to exercise the streaming endpoint."
+FAKE_TOKEN_DELAY = 0.01
+
+PROMPT_TEMPLATE = """
+    Answer the questions based on the provided context only.
+    Please provide the most accurate response based on the question
+    <context>
+        {context}
+    <context>
+    Questions:{input}
+    """
+
+# Same document formatting as create_stuff_documents_chain
+DOCUMENT_PROMPT = PromptTemplate.from_template("{page_content}")
+DOCUMENT_SEPARATOR = "\n\n"
+# Chunks retrieved per question (the as_retriever default)
+TOP_K = 4
+
+
+def make_prompt():
+    return ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
+
+
+def make_llm(groq_api_key, model_name=LLM_MODEL, max_connections=LLM_MAX_CONNECTIONS, provider_name=None):
+    """
+    ChatGroq backed by one pooled HTTP client, so every request reuses warm
+    keep-alive connections instead of paying a new TLS handshake.
+    LLM_PROVIDER=fake returns a local model that streams FAKE_ANSWER instead
+    """
+    provider_name = provider_name or os.getenv('LLM_PROVIDER', 'groq')
+    if provider_name == 'fake':
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        return FakeListChatModel(responses=[FAKE_ANSWER], sleep=FAKE_TOKEN_DELAY)
+    if provider_name != 'groq':
+        raise ValueError(f"Unknown LLM provider '{provider_name}'")
+    import httpx
+    from langchain_groq import ChatGroq
+    http_client = httpx.Client(limits=httpx.Limits(max_connections=max_connections,
+                                                   max_keepalive_connections=max_connections))
+    return ChatGroq(groq_api_key=groq_api_key, model_name=model_name, http_client=http_client)
+
+
+class RAGPipeline:
+    """
+    Retrieval-augmented answering as explicit stages, each timed as a span on the caller's Trace:
+    embed (query embedding), search (FAISS), pack (merge/dedupe chunks into the token
+    budget), prompt (prompt assembly) and llm (generation). Built once at startup and
+    shared by all request threads
+    """
+
+    def __init__(self, vectors, llm, prompt=None, k=TOP_K, token_budget=TOKEN_BUDGET):
+        self.vectors = vectors
+        self.llm = llm
+        self.prompt = prompt or make_prompt()
+        self.k = k
+        self.token_budget = token_budget
+
+    def embed_query(self, question, trace):
+        with trace.span('embed'):
+            return self.vectors.embedding_function.embed_query(question)
+
+    def search(self, query_vector, trace):
+        with trace.span('search'):
+            return self.vectors.similarity_search_by_vector(query_vector, k=self.k)
+
+    def pack(self, docs, trace):
+        """(context documents, token stats) for the retrieved chunks"""
+        with trace.span('pack'):
+            return pack_context(docs, self.token_budget)
+
+    def build_messages(self, question, docs, trace):
+        with trace.span('prompt'):
+            context = DOCUMENT_SEPARATOR.join(format_document(doc, DOCUMENT_PROMPT) for doc in docs)
+            return self.prompt.invoke({'context': context, 'input': question})
+
+    def generate(self, messages, trace):
+        with trace.span('llm'):
+            return self.llm.invoke(messages).content
+
+    def stream_tokens(self, messages, trace):
+        with trace.span('llm'):
+            for chunk in self.llm.stream(messages):
+                if chunk.content:
+                    yield chunk.content
@@ -46,25 +46,47 @@ class Chatbox {
         let msg1 = { name: "User", message: text1 }
         this.messages.push(msg1);
 
+        let msg2 = { name: "Sam", message: "" };
+        this.messages.push(msg2);
+        this.updateChatText(chatbox)
+        textField.value = ''
+
+        // Stream the answer over Server-Sent Events and render tokens as they arrive
         fetch('http://127.0.0.1:5000/predict', {
             method: 'POST',
-            body: JSON.stringify({ message: text1 }),
+            body: JSON.stringify({ message: text1, stream: true }),
             mode: 'cors',
             headers: {
-              'Content-Type': 'application/json'
+              'Content-Type': 'application/json',
+              'Accept': 'text/event-stream'
             },
           })
-          .then(r => r.json())
-          .then(r => {
-            let msg2 = { name: "Sam", message: r.answer };
-            this.messages.push(msg2);
-            this.updateChatText(chatbox)
-            textField.value = ''
+          .then(async r => {
+            const reader = r.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const events = buffer.split('\n\n');
+                buffer = events.pop();
+                events.forEach(raw => {
+                    const event = raw.match(/^event: (.*)$/m);
+                    const data = raw.match(/^data: (.*)$/m);
+                    if (!event || !data) return;
+                    if (event[1] === 'token') {
+                        msg2.message += JSON.parse(data[1]).text;
+                        this.updateChatText(chatbox)
+                    } else if (event[1] === 'error') {
+                        console.error('Error:', JSON.parse(data[1]).error);
+                    }
+                });
+            }
 
         }).catch((error) => {
             console.error('Error:', error);
             this.updateChatText(chatbox)
-            textField.value = ''
           });
     }
 